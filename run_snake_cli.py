@@ -4,6 +4,7 @@ CLI for the GitHub Contribution Snake Generator
 Run this locally to generate your contribution snake animation
 """
 
+import argparse
 import os
 import sys
 from pathlib import Path
@@ -15,7 +16,7 @@ load_dotenv()
 # Add the scripts directory to the path
 sys.path.append(str(Path(__file__).parent))
 
-from scripts.snake_generator import ContributionSnake
+from scripts.snake_generator import ContributionSnake, add_output_arguments
 from scripts.config import validate_config
 
 # ANSI color codes for console output
@@ -42,6 +43,9 @@ print(f"{YELLOW}{'-'*56}{RESET}")
 
 def run_snake_cli():
     """Run the snake generation CLI"""
+    parser = argparse.ArgumentParser(description="Generate your contribution snake animations into dist/")
+    add_output_arguments(parser)
+    args = parser.parse_args()
     
     # Load from .env (already loaded at top)
     username = os.getenv('GITHUB_USERNAME')
@@ -65,17 +69,15 @@ def run_snake_cli():
         print(f"{CYAN}🐍 Starting snake generation for user: {BOLD}{username}{RESET}")
         print(f"{YELLOW}{'-'*56}{RESET}")
         # Initialize and run snake generator
-        snake = ContributionSnake(username, token)
+        snake = ContributionSnake(username, token, formats=args.formats, themes=args.themes)
         
-        # Generate all animations
+        # Generate the selected animations
         success = snake.generate_all(output_dir)
         
         if success:
             print(f"{GREEN}{BOLD}✔ Snake generation complete!{RESET} Check the '{CYAN}dist{RESET}' folder for generated files:")
-            print(f"  {CYAN}• github-contribution-grid-snake.svg{RESET}       (light theme SVG)")
-            print(f"  {CYAN}• github-contribution-grid-snake-dark.svg{RESET}  (dark theme SVG)")
-            print(f"  {CYAN}• github-contribution-grid-snake-light.gif{RESET} (light theme GIF)")
-            print(f"  {CYAN}• github-contribution-grid-snake.gif{RESET}       (dark theme GIF)")
+            for fmt, theme, filename in snake.outputs:
+                print(f"  {CYAN}• {filename:<40}{RESET} ({theme} theme {fmt.upper()})")
             print(f"{GREEN}{'='*56}{RESET}")
         else:
             print(f"{RED}{BOLD}✖ Snake generation failed!{RESET}")
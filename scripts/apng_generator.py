@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+APNG animation generator for GitHub Contribution Snake
+Streams the same delta frames as the GIF into an animated PNG: each frame's
+changed region is compressed by Pillow's PNG encoder and written as an fdAT
+chunk blended over the previous frame
+"""
+
+import io
+import struct
+import zlib
+from functools import partial
+from .config import SNAKE_CONFIG
+from .scene import Scene
+from .gif_generator import FrameWriter, get_sprite_atlas, iter_encoded_frames, write_frames
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def palette_bit_depth(palette):
+    """Smallest PNG bit depth that can index every entry of a flat RGB palette"""
+    colors = len(palette) // 3
+    for bits in (1, 2, 4):
+        if colors <= 1 << bits:
+            return bits
+    return 8
+
+def png_chunk(chunk_type, data):
+    """Serialize a PNG chunk with its length and CRC"""
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+def iter_png_chunks(data):
+    """Yield (type, data) for every chunk of an encoded PNG"""
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        length, chunk_type = struct.unpack('>I4s', data[pos:pos + 8])
+        yield chunk_type, data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+
+def encode_apng_frame(image, offset=(0, 0), bits=8, compress_level=9):
+    """Compress a palette frame and return (offset, size, [IDAT payloads]) for ApngWriter
+
+    All frames are encoded at the same bit depth, so their image data can share
+    one header and palette.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', bits=bits, compress_level=compress_level)
+    data = [chunk for chunk_type, chunk in iter_png_chunks(buffer.getvalue()) if chunk_type == b'IDAT']
+    return offset, image.size, data
+
+def apng_frame_encoder(theme='dark'):
+    """Return the picklable frame encoder for the configured APNG settings"""
+    palette = get_sprite_atlas(theme).palette
+    return partial(encode_apng_frame, bits=palette_bit_depth(palette),
+                   compress_level=SNAKE_CONFIG['apng_compress_level'])
+
+class ApngWriter(FrameWriter):
+    """Streaming APNG encoder, the PNG counterpart of GifWriter
+
+    The frame count in the animation control chunk is only known at the end,
+    so it is patched in when the file is closed.
+    """
+
+    def __init__(self, output_path, size, atlas, loop=0):
+        """Open the output file and write the header, palette and transparency of the atlas"""
+        super().__init__(output_path)
+        self.sequence = 0
+        self.loop = loop
+
+        header = struct.pack('>IIBBBBB', size[0], size[1], palette_bit_depth(atlas.palette), 3, 0, 0, 0)
+        # Only the reserved last palette slot is transparent
+        transparency = bytes([255] * atlas.transparent_index + [0])
+        self.fp.write(PNG_SIGNATURE + png_chunk(b'IHDR', header))
+        self.control_offset = self.fp.tell()
+        self.fp.write(png_chunk(b'acTL', struct.pack('>II', 0, loop)))
+        self.fp.write(png_chunk(b'PLTE', bytes(atlas.palette)) + png_chunk(b'tRNS', transparency))
+
+    def _write_frame(self, frame, duration):
+        offset, size, data = frame
+
+        # Delays are a fraction of a second in 16 bits each; fall back to centiseconds for long ones
+        delay = (duration, 1000) if duration <= 0xffff else (min(0xffff, round(duration / 10)), 100)
+        blend = 1 if self.frame_count > 0 else 0
+        control = struct.pack('>IIIIIHHBB', self.sequence, size[0], size[1], offset[0], offset[1],
+                              delay[0], delay[1], 0, blend)
+        self.fp.write(png_chunk(b'fcTL', control))
+        self.sequence += 1
+
+        # The first frame doubles as the still image for viewers without APNG support
+        for chunk in data:
+            if self.frame_count == 0:
+                self.fp.write(png_chunk(b'IDAT', chunk))
+            else:
+                self.fp.write(png_chunk(b'fdAT', struct.pack('>I', self.sequence) + chunk))
+                self.sequence += 1
+
+    def _finish(self):
+        """Write the trailer, then record the frame count"""
+        self.fp.write(png_chunk(b'IEND', b''))
+        self.fp.seek(self.control_offset)
+        self.fp.write(png_chunk(b'acTL', struct.pack('>II', self.frame_count, self.loop)))
+
+def generate_apng_animation(grid, snake_path, output_path, dark_mode=True, scene=None, frames=None):
+    """Generate an animated PNG of the snake eating contributions
+
+    Takes the same scene and pre-rendered frames (from submit_frames with
+    apng_frame_encoder) as generate_gif_animation.
+    """
+    if not grid:
+        print("No grid data available")
+        return
+
+    if scene is None:
+        scene = Scene(grid, snake_path)
+    theme_name = "dark" if dark_mode else "light"
+
+    if frames is None:
+        frames = iter_encoded_frames(scene, dark_mode, encode=apng_frame_encoder(theme_name))
+
+    print(f"Creating {len(scene.timeline)} frames for APNG animation...")
+
+    size = scene.canvas_size(SNAKE_CONFIG['padding'])
+    with ApngWriter(output_path, size, get_sprite_atlas(theme_name)) as writer:
+        write_frames(writer, frames, scene.timeline)
+
+    print(f"APNG animation ({theme_name} theme) saved to: {output_path}")
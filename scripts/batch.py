@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Batch snake generation for many GitHub users
+Fetches calendars with aliased multi-user GraphQL queries on a bounded thread
+pool and pipelines each fetched calendar straight into planning and rendering
+on a process pool, writing each user's files to <output_dir>/<username>/
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from .config import SNAKE_CONFIG, get_github_token, get_worker_count
+from .github_api import ContributionStore, sync_contributions_many
+from .grid import ContributionGrid
+from .snake_generator import ContributionSnake
+
+def render_user(username, token, weeks_data, output_dir, formats=None, themes=None):
+    """Plan and render one user's animations; the process pool entry point
+
+    Without a token the calendar is rendered offline. Returns (username, success, captured log).
+    """
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        try:
+            snake = ContributionSnake(username, token, workers=1, formats=formats, themes=themes, offline=not token)
+            success = snake.generate_from_weeks(weeks_data, output_dir)
+        except Exception as e:
+            print(f"Error during snake generation: {e}")
+            success = False
+    return username, success, log.getvalue()
+
+def generate_batch(usernames, token, output_dir="dist", workers=None, batch_size=None, concurrency=None,
+                   aggregate=None):
+    """Generate snakes for many users, returning a dict of username to success
+
+    With `aggregate` set, the users' calendars are also summed day by day into
+    one combined snake written to <output_dir>/<aggregate>/.
+    """
+    usernames = list(dict.fromkeys(name.strip() for name in usernames if name.strip()))
+    workers = workers or get_worker_count()
+    batch_size = batch_size or SNAKE_CONFIG['batch_size']
+    concurrency = concurrency or SNAKE_CONFIG['fetch_concurrency']
+    store = ContributionStore()
+    results = {}
+    grids = []
+
+    batches = [usernames[i:i + batch_size] for i in range(0, len(usernames), batch_size)]
+    print(f"Generating snakes for {len(usernames)} users in {len(batches)} batches "
+          f"({concurrency} concurrent fetches, {workers} render workers)")
+
+    def report(username, success, log):
+        results[username] = success
+        if success:
+            print(f"  ✔ {username}")
+        else:
+            print(f"  ✖ {username}")
+            print(log)
+
+    # Spawned rather than forked workers, since fetch threads are running when they start
+    render_pool = None
+    if workers > 1:
+        render_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    render_futures = []
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as fetch_pool:
+            fetch_futures = [fetch_pool.submit(sync_contributions_many, batch, token, store) for batch in batches]
+
+            # Start rendering each batch as soon as its calendars arrive
+            for future in as_completed(fetch_futures):
+                for username, weeks_data in future.result().items():
+                    if not weeks_data:
+                        report(username, False, "Failed to fetch contribution data")
+                        continue
+                    if aggregate:
+                        grids.append(ContributionGrid.from_weeks(weeks_data))
+
+                    user_dir = str(Path(output_dir) / username)
+                    if render_pool:
+                        render_futures.append(render_pool.submit(render_user, username, token, weeks_data, user_dir))
+                    else:
+                        report(*render_user(username, token, weeks_data, user_dir))
+
+        for future in as_completed(render_futures):
+            report(*future.result())
+    finally:
+        if render_pool:
+            render_pool.shutdown()
+
+    if aggregate and grids:
+        print(f"Generating combined snake for {len(grids)} users")
+        snake = ContributionSnake(aggregate, token, workers=workers)
+        results[aggregate] = snake.generate_from_grid(ContributionGrid.aggregate(grids),
+                                                      str(Path(output_dir) / aggregate))
+
+    succeeded = sum(1 for name, success in results.items() if success and name != aggregate)
+    print(f"Batch complete: {succeeded}/{len(usernames)} users succeeded")
+    return results
+
+def main():
+    """Command line entry point: python -m scripts.batch user1 user2 ... [--users-file FILE]"""
+    parser = argparse.ArgumentParser(description="Generate contribution snakes for many GitHub users")
+    parser.add_argument('usernames', nargs='*', help="GitHub usernames")
+    parser.add_argument('--users-file', help="file with one username per line")
+    parser.add_argument('--output', default='dist', help="output directory (one subdirectory per user)")
+    parser.add_argument('--workers', type=int, help="render processes (default: SNAKE_WORKERS)")
+    parser.add_argument('--aggregate', metavar='NAME',
+                        help="also render every user's contributions combined into <output>/NAME")
+    args = parser.parse_args()
+
+    usernames = list(args.usernames)
+    if args.users_file:
+        with open(args.users_file, encoding='utf-8') as f:
+            usernames.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    if not usernames:
+        parser.error("no usernames given")
+
+    token = get_github_token()
+    if not token:
+        sys.exit(1)
+
+    results = generate_batch(usernames, token, args.output, workers=args.workers, aggregate=args.aggregate)
+    if not all(results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for GitHub Contribution Snake
+Plans and renders synthetic contribution grids offline (no GitHub token needed)
+and records wall time, peak memory, frame count and output size per stage,
+optionally comparing the results with a stored baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+from PIL import features
+from .config import SNAKE_CONFIG
+from .grid import ContributionGrid
+from .snake_path import create_snake_path
+from .scene import Scene
+from .svg_generator import generate_svg_animation
+from .gif_generator import generate_gif_animation
+from .webp_generator import generate_webp_animation
+from .apng_generator import generate_apng_animation
+
+# Synthetic calendars as name: (days, share of active days, start date)
+# Every calendar starts on a Sunday unless noted, so the last week's length varies with the day count
+CASES = {
+    'empty': (371, 0.0, date(2024, 1, 7)),
+    'sparse': (371, 0.1, date(2024, 1, 7)),
+    'dense': (371, 0.9, date(2024, 1, 7)),
+    'year': (371, 0.4, date(2024, 1, 7)),
+    'ragged': (368, 0.4, date(2024, 1, 7)),  # 52 full weeks and a last week of four days
+    'decade': (3653, 0.4, date(2016, 1, 3))
+}
+
+STAGES = ('plan', 'scene', 'svg', 'gif', 'webp', 'apng')
+
+# Metrics compared against the baseline; a higher value is worse for all of them
+COMPARED_METRICS = ('seconds', 'peak_kib', 'bytes', 'frames', 'moves')
+
+# Timing changes smaller than this many seconds are noise, whatever their relative size
+MIN_SECONDS_DELTA = 0.03
+
+def synthetic_grid(days, activity, start, seed=0):
+    """Build a reproducible calendar where `activity` of the days have contributions"""
+    rng = random.Random(f"{days}:{activity}:{seed}")
+    return ContributionGrid.from_days(
+        (start + timedelta(days=i), rng.randint(1, 20) if rng.random() < activity else 0)
+        for i in range(days)
+    )
+
+def measure(stage, trace_memory):
+    """Run a stage quietly and return (result, seconds, peak KiB or None)
+
+    Peak memory is the tracemalloc high-water mark of Python allocations;
+    Pillow's pixel buffers are allocated outside it.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = stage()
+    seconds = time.perf_counter() - start
+    peak_kib = None
+    if trace_memory:
+        peak_kib = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    return result, seconds, peak_kib
+
+def run_case(grid, output_dir, repeat=1, trace_memory=True):
+    """Benchmark every stage on one grid; returns {stage: metrics}"""
+    svg_path = Path(output_dir) / 'benchmark.svg'
+    gif_path = Path(output_dir) / 'benchmark.gif'
+    webp_path = Path(output_dir) / 'benchmark.webp'
+    apng_path = Path(output_dir) / 'benchmark.png'
+    state = {}
+
+    stages = {
+        'plan': lambda: create_snake_path(grid, seed=0),
+        'scene': lambda: Scene(grid, state['path']),
+        'svg': lambda: generate_svg_animation(grid, state['path'], svg_path, scene=state['scene'], compress=False),
+        'gif': lambda: generate_gif_animation(grid, state['path'], gif_path, scene=state['scene']),
+        'webp': lambda: generate_webp_animation(grid, state['path'], webp_path, scene=state['scene']),
+        'apng': lambda: generate_apng_animation(grid, state['path'], apng_path, scene=state['scene'])
+    }
+
+    results = {}
+    for name in STAGES:
+        if name == 'webp' and not features.check('webp'):
+            # Pillow was built without WebP support, so the writer produces nothing
+            continue
+        # Best of `repeat` untraced runs for time, plus one traced run for memory
+        timings = []
+        for _ in range(repeat):
+            result, seconds, _ = measure(stages[name], False)
+            timings.append(seconds)
+        metrics = {'seconds': round(min(timings), 4)}
+        if trace_memory:
+            _, _, metrics['peak_kib'] = measure(stages[name], True)
+
+        if name == 'plan':
+            state['path'] = result
+            metrics['moves'] = len(result)
+        elif name == 'scene':
+            state['scene'] = result
+            metrics['frames'] = len(result.timeline)
+        elif name == 'svg':
+            metrics['bytes'] = svg_path.stat().st_size
+        elif name == 'gif':
+            metrics['bytes'] = gif_path.stat().st_size
+        elif name == 'webp':
+            metrics['bytes'] = webp_path.stat().st_size
+        elif name == 'apng':
+            metrics['bytes'] = apng_path.stat().st_size
+        results[name] = metrics
+    return results
+
+def run_benchmarks(case_names=None, repeat=1, trace_memory=True):
+    """Benchmark the selected cases (default: all); returns {case: {stage: metrics}}"""
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name in case_names or CASES:
+            days, activity, start = CASES[name]
+            grid = synthetic_grid(days, activity, start)
+            print(f"Benchmarking {name}: {len(grid)} weeks, {days} days, {activity:.0%} active")
+            results[name] = run_case(grid, output_dir, repeat, trace_memory)
+    return results
+
+def compare(results, baseline, tolerance, min_seconds=MIN_SECONDS_DELTA):
+    """Return (case, stage, metric, baseline, current, change) rows and the regressions among them
+
+    A metric regresses when it grew by more than `tolerance` (a fraction) over
+    the baseline; timings must also have grown by at least `min_seconds`.
+    """
+    rows = []
+    regressions = []
+    for case, stages in results.items():
+        for stage, metrics in stages.items():
+            previous = baseline.get(case, {}).get(stage, {})
+            for metric in COMPARED_METRICS:
+                if metric not in metrics or metric not in previous:
+                    continue
+                before, after = previous[metric], metrics[metric]
+                change = (after - before) / before if before else 0.0
+                row = (case, stage, metric, before, after, change)
+                rows.append(row)
+                # Short stages vary by tens of milliseconds between runs
+                if change > tolerance and not (metric == 'seconds' and after - before < min_seconds):
+                    regressions.append(row)
+    return rows, regressions
+
+def format_results(results):
+    """Format results as a table"""
+    lines = [f"{'case':<8} {'stage':<6} {'seconds':>9} {'peak KiB':>9} {'moves':>7} {'frames':>7} {'bytes':>10}"]
+    for case, stages in results.items():
+        for stage, metrics in stages.items():
+            cells = [metrics.get(metric, '') for metric in ('seconds', 'peak_kib', 'moves', 'frames', 'bytes')]
+            lines.append(f"{case:<8} {stage:<6} {cells[0]:>9} {cells[1]:>9} {cells[2]:>7} {cells[3]:>7} {cells[4]:>10}")
+    return "\n".join(lines)
+
+def format_comparison(rows, regressions):
+    """Format a baseline comparison as a table, marking regressions"""
+    lines = [f"{'case':<8} {'stage':<6} {'metric':<9} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for row in rows:
+        case, stage, metric, before, after, change = row
+        marker = "  << regression" if row in regressions else ""
+        lines.append(f"{case:<8} {stage:<6} {metric:<9} {before:>10} {after:>10} {change:>+8.1%}{marker}")
+    return "\n".join(lines)
+
+def main():
+    """Command line entry point: python -m scripts.benchmark [--baseline FILE] [--save FILE]"""
+    parser = argparse.ArgumentParser(description="Benchmark snake planning and rendering on synthetic grids")
+    parser.add_argument('cases', nargs='*', help=f"cases to run: {', '.join(CASES)} (default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per stage, best is kept (default: 3)")
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced run that measures peak memory")
+    parser.add_argument('--planner', choices=['greedy', 'sweep'], help="planner to benchmark (default: config)")
+    parser.add_argument('--backend', choices=['pillow', 'numpy'], help="GIF raster backend to benchmark (default: config)")
+    parser.add_argument('--baseline', help="compare with results saved by --save")
+    parser.add_argument('--save', help="write the results as JSON for use as a baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="relative growth over the baseline reported as a regression (default: 0.25)")
+    parser.add_argument('--min-seconds', type=float, default=MIN_SECONDS_DELTA,
+                        help=f"smallest timing growth reported as a regression (default: {MIN_SECONDS_DELTA})")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+    if args.planner:
+        SNAKE_CONFIG['planner'] = args.planner
+    if args.backend:
+        SNAKE_CONFIG['raster_backend'] = args.backend
+
+    results = run_benchmarks(args.cases, args.repeat, not args.no_memory)
+    print()
+    print(format_results(results))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'config': SNAKE_CONFIG, 'results': results}, f, indent=2)
+        print(f"\nResults saved to: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        rows, regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        print()
+        print(format_comparison(rows, regressions))
+        if regressions:
+            print(f"\n{len(regressions)} metrics regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+if __name__ == "__main__":
+    main()
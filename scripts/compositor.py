@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Frame compositing shared by the raster backends
+Tracks which cells the snake and its meals repaint between simulation steps,
+so each frame only touches those; the Pillow and NumPy backends supply the
+canvas operations
+"""
+
+from .config import SNAKE_CONFIG
+
+class Compositor:
+    """Single-canvas frame renderer that only repaints the cells that change between frames
+
+    Subclasses keep the canvas in their own representation and implement
+    new_base, sprite, _blit, _restore_box, full_frame and delta_frame.
+    """
+
+    def __init__(self, scene, atlas):
+        """Render the static contribution grid once and set up the working canvas"""
+        self.scene = scene
+        self.atlas = atlas
+        self.padding = SNAKE_CONFIG['padding']
+        self.width, self.height = scene.canvas_size(self.padding)
+
+        # The base holds the grid with eaten cells but never the snake
+        self.base = self.new_base()
+        self.canvas = self.base.copy()
+        # Simulation step currently on the canvas
+        self.step = -1
+
+        # Regions the snake painted over in the current frame, restored from the base next frame
+        self.snake_boxes = []
+        # Regions repainted while producing the current frame
+        self.dirty_boxes = []
+
+    def new_base(self):
+        """Return a canvas with the contribution grid drawn on it"""
+        raise NotImplementedError
+
+    def sprite(self, kind, index=0, glow=False):
+        """Return the atlas sprite for a 'cell' level, 'head' or 'body' segment index"""
+        raise NotImplementedError
+
+    def _blit(self, canvas, col, row, sprite):
+        """Paste a sprite at a cell and return the box it covers"""
+        raise NotImplementedError
+
+    def _restore_box(self, box):
+        """Copy a box of the base back over the canvas"""
+        raise NotImplementedError
+
+    def full_frame(self, canvas):
+        """Return a standalone palette image of the whole canvas"""
+        raise NotImplementedError
+
+    def delta_frame(self, previous, bbox):
+        """Return the changed region of the canvas inside a box, with unchanged pixels transparent
+
+        The region is also copied onto previous. Returns None when nothing
+        inside the box actually changed.
+        """
+        raise NotImplementedError
+
+    def eat(self, col, row):
+        """Repaint an eaten cell as empty on both the base and the canvas"""
+        empty_cell = self.sprite('cell', 0)
+        self._blit(self.base, col, row, empty_cell)
+        self.dirty_boxes.append(self._blit(self.canvas, col, row, empty_cell))
+
+    def restore(self):
+        """Erase the snake drawn in the previous frame by copying the base back over it"""
+        for box in self.snake_boxes:
+            self._restore_box(box)
+        self.dirty_boxes.extend(self.snake_boxes)
+        self.snake_boxes = []
+
+    def draw_snake(self, step):
+        """Draw the snake for a simulation step on top of the canvas, recording the regions it covers"""
+        for i, col, row, eating in self.scene.segments[step]:
+            # Snake head (brightest) glows while eating; the body fades toward the tail
+            if i == 0:
+                sprite = self.sprite('head', glow=eating)
+            else:
+                sprite = self.sprite('body', i)
+            box = self._blit(self.canvas, col, row, sprite)
+            self.snake_boxes.append(box)
+            self.dirty_boxes.append(box)
+
+    def dirty_bbox(self):
+        """Return the bounding box of everything repainted for the current frame, or None"""
+        if not self.dirty_boxes:
+            return None
+        left = max(0, min(box[0] for box in self.dirty_boxes))
+        top = max(0, min(box[1] for box in self.dirty_boxes))
+        right = min(self.width, max(box[2] for box in self.dirty_boxes))
+        bottom = min(self.height, max(box[3] for box in self.dirty_boxes))
+        return (left, top, right, bottom)
+
+    def seek(self, step):
+        """Jump a fresh compositor straight to a simulation step without producing the ones before it"""
+        empty_cell = self.sprite('cell', 0)
+        for eaten in self.scene.eat_events[:step + 1]:
+            if eaten:
+                self._blit(self.base, eaten[0], eaten[1], empty_cell)
+
+        self.canvas = self.base.copy()
+        self.step = step
+        self.snake_boxes = []
+        self.dirty_boxes = []
+        self.draw_snake(step)
+        return self.canvas
+
+    def render(self, step):
+        """Advance the canvas to the given simulation step and return it"""
+        self.dirty_boxes = []
+        self.restore()
+
+        # Cells the snake head reached since the last rendered step are shown as eaten
+        for eaten in self.scene.eat_events[self.step + 1:step + 1]:
+            if eaten:
+                self.eat(*eaten)
+        self.step = step
+
+        self.draw_snake(step)
+        return self.canvas
+
+def iter_frames(compositor, start=0, stop=None):
+    """Yield (image, offset) for timeline frames start..stop-1
+
+    The first frame of the animation is the full canvas; later frames are
+    transparent deltas of the changed region, or None when the frame looks
+    exactly like the previous one.
+    """
+    timeline = compositor.scene.timeline
+    if stop is None:
+        stop = len(timeline)
+
+    previous = None
+    if start > 0:
+        # Deltas are relative to the frame before the range, so rebuild it first
+        previous = compositor.seek(timeline[start - 1][0]).copy()
+
+    for step, _ in timeline[start:stop]:
+        canvas = compositor.render(step)
+
+        if previous is None:
+            previous = canvas.copy()
+            yield compositor.full_frame(canvas), (0, 0)
+            continue
+
+        bbox = compositor.dirty_bbox()
+        region = compositor.delta_frame(previous, bbox) if bbox else None
+        if region is None:
+            yield None
+            continue
+        yield region, bbox[:2]
@@ -23,6 +23,20 @@ def get_github_token():
         return None
     return token
 
+def get_worker_count():
+    """Get the number of render worker processes (SNAKE_WORKERS, 0 = all cores)"""
+    workers = os.getenv('SNAKE_WORKERS')
+    if workers is None:
+        workers = SNAKE_CONFIG['workers']
+    try:
+        workers = int(workers)
+    except ValueError:
+        print(f"Warning: ignoring invalid SNAKE_WORKERS value: {workers}")
+        workers = SNAKE_CONFIG['workers']
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
 def validate_config():
     """Validate that all required configuration is present"""
     username = get_github_username()
@@ -49,7 +63,27 @@ SNAKE_CONFIG = {
     'cell_spacing': 3,
     'snake_length': 6,
     'animation_duration': 120,  # milliseconds per frame
-    'padding': 30
+    'padding': 30,
+    'frame_budget': None,  # most GIF frames; longer paths skip idle steps (None renders every step)
+    'duration_budget': None,  # longest GIF loop in milliseconds (None keeps animation_duration per step)
+    'years': 1,  # years of contribution history to draw
+    'planner': 'greedy',  # snake path planner: 'greedy' or 'sweep' (deterministic, full coverage)
+    'seed': None,  # planning seed; None derives one from the contribution grid
+    'replan': False,  # reuse the last run's greedy path up to the first changed day (output then depends on history)
+    'level_strategy': 'linear',  # how counts map to levels 0-4: 'linear', 'quartile' or 'log'
+    'raster_backend': 'auto',  # GIF rasterizer: 'pillow', 'numpy' or 'auto' (NumPy when installed); output is identical
+    'webp_lossless': True,  # lossless WebP frames; False encodes them lossy at 'webp_quality'
+    'webp_quality': 80,  # WebP quality 0-100 when lossy, compression effort when lossless
+    'webp_method': 4,  # WebP encoder speed/size trade-off, 0 (fastest) to 6 (smallest)
+    'apng_compress_level': 9,  # zlib level 0-9 for APNG frames (PNG is always lossless)
+    'svgz': False,  # also write gzip'd .svgz copies of the SVGs
+    'workers': 1,  # render processes; 0 uses every core (overridden by SNAKE_WORKERS)
+    'cache_dir': '.snake-cache',  # render cache location, '' disables (overridden by SNAKE_CACHE_DIR)
+    'cache_max_entries': 32,  # cached artifacts kept per user before the least recently used are evicted
+    'store_dir': '.snake-cache/contributions',  # last fetched calendars, '' disables (overridden by SNAKE_STORE_DIR)
+    'metrics_file': '.snake-cache/metrics.jsonl',  # per-stage metrics, kept out of the output, '' disables (SNAKE_METRICS)
+    'batch_size': 25,  # users per aliased GraphQL query in batch mode
+    'fetch_concurrency': 4  # GraphQL requests in flight at once in batch mode
 }
 
 # Color schemes
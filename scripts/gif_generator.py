@@ -3,139 +3,363 @@
 GIF animation generator for GitHub Contribution Snake
 """
 
-from PIL import Image, ImageDraw
+import struct
+from PIL import Image, ImageChops, ImageDraw, GifImagePlugin
 from .config import SNAKE_CONFIG, COLORS
+from .scene import Scene
+from .compositor import Compositor, iter_frames
 
-def generate_gif_animation(grid, snake_path, output_path, dark_mode=True):
-    """Generate GIF animation of the snake eating contributions"""
+try:
+    from .gif_numpy import ArrayCompositor
+except ImportError:  # NumPy is optional; the Pillow compositor is used instead
+    ArrayCompositor = None
+
+RASTER_BACKENDS = ('auto', 'pillow', 'numpy')
+
+# Maps a zero palette-index difference to a full mask and anything else to none
+UNCHANGED_LUT = [255] + [0] * 255
+
+# Glow drawn around the head while it eats a contribution, per theme
+GLOW_COLORS = {
+    'dark': '#ff9999',
+    'light': '#ff6666'
+}
+
+def blend_body_colors(colors, snake_length):
+    """Return the faded body colors for segments 1..snake_length-1, blended with the background"""
+    snake_color = colors['snake']
+    body_colors = []
+    for i in range(1, snake_length):
+        # Snake body with fading effect
+        alpha = 1.0 - (i / snake_length) * 0.6
+        if snake_color.startswith('#'):
+            rgb = tuple(int(snake_color[j:j+2], 16) for j in (1, 3, 5))
+            # Blend with background for fade effect
+            bg_rgb = tuple(int(colors['background'][j:j+2], 16) for j in (1, 3, 5))
+            blended = tuple(int(rgb[k] * alpha + bg_rgb[k] * (1 - alpha)) for k in range(3))
+            body_colors.append(f"#{blended[0]:02x}{blended[1]:02x}{blended[2]:02x}")
+        else:
+            body_colors.append(snake_color)
+    return body_colors
+
+def hex_to_rgb(color):
+    """Convert a '#rrggbb' color to an (r, g, b) tuple"""
+    return tuple(int(color[j:j+2], 16) for j in (1, 3, 5))
+
+class SpriteAtlas:
+    """Cache of pre-rasterized cell and snake tiles for one theme
+
+    Every color the animation can show is known up front, so tiles are drawn
+    directly as palette indices into a small fixed palette shared by all frames.
+    """
+
+    def __init__(self, theme):
+        """Precompute the theme colors and palette; tiles are rasterized lazily on first use"""
+        self.theme = theme
+        self.colors = COLORS[theme]
+        self.cell_size = SNAKE_CONFIG['cell_size']
+        self.body_colors = blend_body_colors(self.colors, SNAKE_CONFIG['snake_length'])
+        self.sprites = {}
+
+        theme_colors = ([self.colors['background']] + self.colors['levels'] +
+                        [self.colors['snake_head'], GLOW_COLORS[theme]] + self.body_colors)
+        self.palette_colors = list(dict.fromkeys(theme_colors))
+        self.palette_index = {color: i for i, color in enumerate(self.palette_colors)}
+        # One extra slot marks pixels a delta frame leaves unchanged
+        self.transparent_index = len(self.palette_colors)
+        self.palette = [channel for color in self.palette_colors for channel in hex_to_rgb(color)]
+        self.palette += [0, 0, 0]
+
+    def new_image(self, size, color):
+        """Create a palette image filled with one of the theme colors"""
+        image = Image.new('P', size, self.palette_index[color])
+        image.putpalette(self.palette)
+        return image
+
+    def _rasterize(self, size, shapes):
+        """Draw (rect, radius, color) shapes into a tile and a mask covering the drawn pixels"""
+        tile = self.new_image((size, size), self.colors['background'])
+        mask = Image.new('L', (size, size), 0)
+        tile_draw = ImageDraw.Draw(tile)
+        mask_draw = ImageDraw.Draw(mask)
+        for rect, radius, color in shapes:
+            tile_draw.rounded_rectangle(rect, radius=radius, fill=self.palette_index[color])
+            mask_draw.rounded_rectangle(rect, radius=radius, fill=255)
+        return tile, mask
+
+    def get(self, kind, index=0, glow=False):
+        """Return (tile, mask, offset) for a 'cell' level, 'head' or 'body' segment index
+
+        The offset is where the tile's top-left corner sits relative to the cell origin.
+        """
+        key = (kind, index, glow)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            return sprite
+
+        cell_size = self.cell_size
+        if kind == 'cell':
+            tile, mask = self._rasterize(cell_size + 1, [([0, 0, cell_size, cell_size], 2, self.colors['levels'][index])])
+            sprite = (tile, mask, 0)
+        elif kind == 'head' and glow:
+            # Eating effect - glow 3px around the cell with a slightly enlarged head on top
+            shapes = [
+                ([0, 0, cell_size + 6, cell_size + 6], 4, GLOW_COLORS[self.theme]),
+                ([2, 2, cell_size + 4, cell_size + 4], 3, self.colors['snake_head'])
+            ]
+            tile, mask = self._rasterize(cell_size + 7, shapes)
+            sprite = (tile, mask, -3)
+        elif kind == 'head':
+            tile, mask = self._rasterize(cell_size + 1, [([0, 0, cell_size, cell_size], 3, self.colors['snake_head'])])
+            sprite = (tile, mask, 0)
+        else:
+            tile, mask = self._rasterize(cell_size + 1, [([0, 0, cell_size, cell_size], 2, self.body_colors[index - 1])])
+            sprite = (tile, mask, 0)
+
+        self.sprites[key] = sprite
+        return sprite
+
+_SPRITE_ATLASES = {}
+
+def get_sprite_atlas(theme):
+    """Return the shared sprite atlas for a theme, rebuilding it if the cell geometry changed"""
+    key = (theme, SNAKE_CONFIG['cell_size'], SNAKE_CONFIG['snake_length'])
+    atlas = _SPRITE_ATLASES.get(key)
+    if atlas is None:
+        atlas = SpriteAtlas(theme)
+        _SPRITE_ATLASES[key] = atlas
+    return atlas
+
+class FrameCompositor(Compositor):
+    """Compositor over a Pillow palette image"""
+
+    def new_base(self):
+        """Create the background image and paste every cell's level tile onto it"""
+        base = self.atlas.new_image((self.width, self.height), self.atlas.colors['background'])
+        for col, row, level in self.scene.cells:
+            self._blit(base, col, row, self.atlas.get('cell', level))
+        return base
+
+    def sprite(self, kind, index=0, glow=False):
+        """Return the atlas sprite as (tile image, mask image, offset)"""
+        return self.atlas.get(kind, index, glow)
+
+    def _blit(self, image, col, row, sprite):
+        """Paste a sprite at a cell and return the box it covers"""
+        tile, mask, offset = sprite
+        x, y = self.scene.cell_origin(col, row, self.padding)
+        box = (x + offset, y + offset, x + offset + tile.width, y + offset + tile.height)
+        image.paste(tile, box, mask)
+        return box
+
+    def _restore_box(self, box):
+        """Copy a box of the base back over the canvas"""
+        self.canvas.paste(self.base.crop(box), box[:2])
+
+    def full_frame(self, canvas):
+        """Return a copy of the canvas"""
+        return canvas.copy()
+
+    def delta_frame(self, previous, bbox):
+        """Return the changed region of the canvas inside a box, or None, and copy it onto previous"""
+        region = delta_frame(self.atlas, previous, self.canvas, bbox)
+        if region is not None:
+            previous.paste(self.canvas.crop(bbox), bbox[:2])
+        return region
+
+def delta_frame(atlas, previous, current, bbox):
+    """Crop the changed region of a frame, marking pixels equal to the previous frame transparent
+
+    Returns None when nothing inside the box actually changed.
+    """
+    region = current.crop(bbox)
+    before = previous.crop(bbox)
+
+    # Compare raw palette indices; both frames share the same palette
+    changed = ImageChops.difference(
+        Image.frombytes('L', region.size, region.tobytes()),
+        Image.frombytes('L', before.size, before.tobytes())
+    )
+    if not changed.getbbox():
+        return None
+
+    unchanged = changed.point(UNCHANGED_LUT)
+    region.paste(atlas.transparent_index, mask=unchanged)
+    return region
+
+def encode_gif_frame(image, offset=(0, 0)):
+    """LZW-encode a palette frame as a GIF image descriptor and data, without its control block"""
+    return b''.join(GifImagePlugin.getdata(image, offset))
+
+class FrameWriter:
+    """Streaming animation encoder that writes each encoded frame as soon as it is produced
+
+    The previous frame is held back until the next one arrives so that frames
+    with no visible change can extend its duration instead of being written.
+    Subclasses write their header when opened and implement _write_frame and _finish.
+    """
+
+    def __init__(self, output_path):
+        """Open the output file"""
+        self.frame_count = 0
+        self.pending = None
+        self.fp = open(output_path, 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_frame(self, frame, duration):
+        """Queue an encoded frame; every frame after the first is a delta drawn over the previous one"""
+        self._flush()
+        self.pending = [frame, duration]
+
+    def extend(self, duration):
+        """Show the most recent frame for longer instead of writing an identical one"""
+        self.pending[1] += duration
+
+    def _flush(self):
+        if self.pending is None:
+            return
+        frame, duration = self.pending
+        self._write_frame(frame, int(duration))
+        self.frame_count += 1
+        self.pending = None
+
+    def _write_frame(self, frame, duration):
+        """Write one encoded frame shown for a whole number of milliseconds"""
+        raise NotImplementedError
+
+    def _finish(self):
+        """Write whatever follows the last frame"""
+
+    def close(self):
+        """Write the last frame and the trailer"""
+        if self.fp.closed:
+            return
+        self._flush()
+        self._finish()
+        self.fp.close()
+
+class GifWriter(FrameWriter):
+    """Streaming GIF encoder with the atlas palette as the global color table"""
+
+    def __init__(self, output_path, size, atlas, loop=0):
+        """Open the output file and write the header with the atlas palette as the global color table"""
+        super().__init__(output_path)
+        self.atlas = atlas
+
+        table_bits = max(1, (len(atlas.palette) // 3 - 1).bit_length())
+        color_table = bytes(atlas.palette) + bytes(3 * ((1 << table_bits) - len(atlas.palette) // 3))
+
+        # Header, logical screen descriptor and global color table
+        self.fp.write(b'GIF89a' + struct.pack('<HHBBB', size[0], size[1], 0x80 | (table_bits - 1), 0, 0))
+        self.fp.write(color_table)
+        # Netscape looping extension
+        self.fp.write(b'!\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', loop) + b'\x00')
+
+    def _write_frame(self, data, duration):
+        # Graphic control extension: leave the frame in place (disposal 1) and, for
+        # deltas, treat the reserved palette slot as transparent
+        packed = 1 << 2
+        transparency = 0
+        if self.frame_count > 0:
+            packed |= 1
+            transparency = self.atlas.transparent_index
+        self.fp.write(b'!\xf9\x04' + struct.pack('<BHBB', packed, duration // 10, transparency, 0))
+        self.fp.write(data)
+
+    def _finish(self):
+        self.fp.write(b';')
+
+def raster_backend():
+    """Return the frame rasterization backend to use, 'pillow' or 'numpy'
+
+    SNAKE_CONFIG['raster_backend'] picks one explicitly; 'auto' uses NumPy when
+    it is installed. Both produce identical frames.
+    """
+    backend = SNAKE_CONFIG.get('raster_backend', 'auto')
+    if backend not in RASTER_BACKENDS:
+        print(f"Warning: unknown raster backend '{backend}', using 'auto'")
+        backend = 'auto'
+    if backend == 'numpy' and ArrayCompositor is None:
+        print("Warning: NumPy is not installed, using the Pillow raster backend")
+        return 'pillow'
+    if backend == 'auto':
+        return 'pillow' if ArrayCompositor is None else 'numpy'
+    return backend
+
+def iter_delta_frames(scene, dark_mode=True, start=0, stop=None):
+    """Yield (image, offset) delta frames start..stop-1 from the configured raster backend
+
+    This is the frame source shared by every animated raster format.
+    """
+    atlas = get_sprite_atlas('dark' if dark_mode else 'light')
+    compositor_class = ArrayCompositor if raster_backend() == 'numpy' else FrameCompositor
+    return iter_frames(compositor_class(scene, atlas), start, stop)
+
+def iter_encoded_frames(scene, dark_mode=True, start=0, stop=None, encode=encode_gif_frame):
+    """Yield encoded frames start..stop-1, or None for frames identical to the previous one"""
+    for frame in iter_delta_frames(scene, dark_mode, start, stop):
+        yield None if frame is None else encode(*frame)
+
+def encode_frame_chunk(scene, dark_mode, start, stop, encode=encode_gif_frame):
+    """Render and encode one chunk of frames; the process pool entry point"""
+    return list(iter_encoded_frames(scene, dark_mode, start, stop, encode))
+
+def submit_frames(executor, scene, dark_mode, workers, encode=encode_gif_frame):
+    """Render an animation's frames in chunks on a process pool
+
+    All chunks are submitted immediately; the returned generator yields the
+    encoded frames in order as each chunk completes. `encode` turns a delta
+    frame into the payload its format's writer expects and must be picklable.
+    """
+    frame_count = len(scene.timeline)
+    chunk_size = max(32, -(-frame_count // (workers * 4)))
+    futures = [
+        executor.submit(encode_frame_chunk, scene, dark_mode, start, min(start + chunk_size, frame_count), encode)
+        for start in range(0, frame_count, chunk_size)
+    ]
+
+    def ordered_frames():
+        for future in futures:
+            yield from future.result()
+
+    return ordered_frames()
+
+def write_frames(writer, frames, timeline):
+    """Feed encoded frames to a writer, folding frames identical to the previous one into its duration"""
+    for frame, (_, duration) in zip(frames, timeline):
+        if frame is None:
+            writer.extend(duration)
+        else:
+            writer.add_frame(frame, duration)
+
+def generate_gif_animation(grid, snake_path, output_path, dark_mode=True, scene=None, frames=None):
+    """Generate GIF animation of the snake eating contributions
+
+    Pass a prebuilt Scene to reuse its simulation across themes and formats, and
+    frames from submit_frames to encode frames rendered on a process pool.
+    """
     if not grid:
         print("No grid data available")
         return
-        
-    rows = len(grid[0])
-    cols = len(grid)
-    
-    # Get configuration
-    cell_size = SNAKE_CONFIG['cell_size']
-    cell_spacing = SNAKE_CONFIG['cell_spacing']
-    snake_length = SNAKE_CONFIG['snake_length']
-    animation_duration = SNAKE_CONFIG['animation_duration']
-    padding = SNAKE_CONFIG['padding']
-    
-    # Get colors based on theme
-    colors = COLORS['dark'] if dark_mode else COLORS['light']
-    
-    # Calculate image dimensions with proper padding
-    width = cols * (cell_size + cell_spacing) - cell_spacing + (padding * 2)
-    height = rows * (cell_size + cell_spacing) - cell_spacing + (padding * 2)
-    
-    frames = []
-    
-    # Track which contributions have been eaten
-    eaten_positions = set()
-    
-    print(f"Creating {len(snake_path) + snake_length} frames for GIF animation...")
-    
-    for frame_idx in range(len(snake_path) + snake_length):
-        # Create frame
-        img = Image.new('RGB', (width, height), colors['background'])
-        draw = ImageDraw.Draw(img)
-        
-        # Mark positions that the snake head has visited as "eaten"
-        if frame_idx < len(snake_path):
-            snake_head_col, snake_head_row, _ = snake_path[frame_idx]
-            eaten_positions.add((snake_head_col, snake_head_row))
-        
-        # Draw contribution grid
-        for col in range(cols):
-            for row in range(rows):
-                if row >= len(grid[col]):
-                    continue
-                    
-                x = col * (cell_size + cell_spacing) + padding
-                y = row * (cell_size + cell_spacing) + padding
-                
-                # If this position has been eaten by the snake, show it as empty
-                if (col, row) in eaten_positions:
-                    level = 0  # Empty/eaten contribution
-                else:
-                    level = min(4, grid[col][row]['level'])
-                
-                color = colors['levels'][level]
-                
-                # Draw rounded rectangle
-                draw.rounded_rectangle(
-                    [x, y, x + cell_size, y + cell_size],
-                    radius=2,
-                    fill=color
-                )
-        
-        # Draw snake
-        for i in range(snake_length):
-            snake_pos = frame_idx - i
-            if 0 <= snake_pos < len(snake_path):
-                col, row, contribution_count = snake_path[snake_pos]
-                
-                # Skip if out of bounds
-                if col >= len(grid) or row >= len(grid[col]):
-                    continue
-                    
-                x = col * (cell_size + cell_spacing) + padding
-                y = row * (cell_size + cell_spacing) + padding
-                
-                # Snake head (brightest) with eating effect
-                if i == 0:
-                    color = colors['snake_head']
-                    
-                    # If eating a contribution, make the head glow/pulse
-                    if contribution_count > 0:
-                        # Eating effect - make head slightly larger and brighter
-                        offset = 2
-                        # Draw glow effect - different colors for light/dark theme
-                        glow_color = '#ff9999' if dark_mode else '#ff6666'
-                        draw.rounded_rectangle(
-                            [x - offset - 1, y - offset - 1, x + cell_size + offset + 1, y + cell_size + offset + 1],
-                            radius=4,
-                            fill=glow_color
-                        )
-                        
-                    # Draw the main head
-                    offset = 1 if contribution_count > 0 else 0
-                    draw.rounded_rectangle(
-                        [x - offset, y - offset, x + cell_size + offset, y + cell_size + offset],
-                        radius=3,
-                        fill=color
-                    )
-                else:
-                    # Snake body with fading effect
-                    alpha = 1.0 - (i / snake_length) * 0.6
-                    # Convert hex to RGB and apply alpha effect
-                    snake_color = colors['snake']
-                    if snake_color.startswith('#'):
-                        rgb = tuple(int(snake_color[j:j+2], 16) for j in (1, 3, 5))
-                        # Blend with background for fade effect
-                        bg_rgb = tuple(int(colors['background'][j:j+2], 16) for j in (1, 3, 5))
-                        blended = tuple(int(rgb[k] * alpha + bg_rgb[k] * (1 - alpha)) for k in range(3))
-                        color = f"#{blended[0]:02x}{blended[1]:02x}{blended[2]:02x}"
-                    else:
-                        color = snake_color
-                    
-                    draw.rounded_rectangle(
-                        [x, y, x + cell_size, y + cell_size],
-                        radius=2,
-                        fill=color
-                    )
-        
-        frames.append(img)
-    
-    # Save GIF with optimized settings
-    frames[0].save(
-        output_path,
-        save_all=True,
-        append_images=frames[1:],
-        duration=animation_duration,
-        loop=0,
-        optimize=True
-    )
+
+    if scene is None:
+        scene = Scene(grid, snake_path)
     theme_name = "dark" if dark_mode else "light"
+
+    if frames is None:
+        # The static grid is rendered once; each frame only repaints what the snake touched
+        frames = iter_encoded_frames(scene, dark_mode)
+
+    print(f"Creating {len(scene.timeline)} frames for GIF animation...")
+
+    # Frames are encoded as they are produced, so memory stays flat regardless of path length
+    size = scene.canvas_size(SNAKE_CONFIG['padding'])
+    with GifWriter(output_path, size, get_sprite_atlas(theme_name)) as writer:
+        write_frames(writer, frames, scene.timeline)
+
     print(f"GIF animation ({theme_name} theme) saved to: {output_path}")
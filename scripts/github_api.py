@@ -3,15 +3,28 @@
 GitHub API module for fetching contribution data
 """
 
-import requests
 import json
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from .config import SNAKE_CONFIG
+from .grid import ContributionGrid, sunday_before
 
-def fetch_contributions(username, token):
-    """Fetch contribution data from GitHub GraphQL API"""
-    query = """
-    query($username: String!) {
-        user(login: $username) {
-            contributionsCollection {
+# GraphQL endpoint; point GITHUB_GRAPHQL_URL at a local stub server for testing
+GITHUB_GRAPHQL_URL = os.getenv('GITHUB_GRAPHQL_URL', 'https://api.github.com/graphql')
+
+# Seconds to wait for the GraphQL API before giving up
+REQUEST_TIMEOUT = 30
+
+# Rate-limit retries and the longest wait between them, in seconds
+MAX_RETRIES = 5
+MAX_BACKOFF = 60
+
+# Days before the last stored day that are fetched again, since recent days can still change
+REFRESH_DAYS = 7
+
+CALENDAR_FIELDS = """
                 contributionCalendar {
                     weeks {
                         contributionDays {
@@ -21,50 +34,301 @@ def fetch_contributions(username, token):
                         }
                     }
                 }
-            }
+"""
+
+CALENDAR_QUERY = """
+    query($username: String!) {
+        user(login: $username) {
+            contributionsCollection {%s}
+        }
+    }
+""" % CALENDAR_FIELDS
+
+RANGE_QUERY = """
+    query($username: String!, $from: DateTime!, $to: DateTime!) {
+        user(login: $username) {
+            contributionsCollection(from: $from, to: $to) {%s}
         }
     }
+""" % CALENDAR_FIELDS
+
+_session = None
+
+def get_session():
+    """Return the shared HTTP session so connections are pooled across requests"""
+    global _session
+    if _session is None:
+        # Imported on first use so offline runs (stored or replayed calendars) skip its startup cost
+        import requests
+        _session = requests.Session()
+    return _session
+
+def post_graphql(query, variables, token, retries=MAX_RETRIES):
+    """POST a GraphQL query, backing off and retrying when rate limited
+
+    Returns the decoded response body, or None if the request failed.
     """
-    
+    import requests
+
     headers = {
         'Authorization': f'Bearer {token}',
         'Content-Type': 'application/json',
     }
-    
-    response = requests.post(
-        'https://api.github.com/graphql',
-        json={'query': query, 'variables': {'username': username}},
-        headers=headers
-    )
-    
-    if response.status_code != 200:
-        print(f"Error fetching data: {response.status_code}")
-        print(response.text)
+
+    for attempt in range(retries + 1):
+        try:
+            response = get_session().post(
+                GITHUB_GRAPHQL_URL,
+                json={'query': query, 'variables': variables},
+                headers=headers,
+                timeout=REQUEST_TIMEOUT
+            )
+        except requests.RequestException as e:
+            print(f"Error fetching data: {e}")
+            return None
+
+        data = response.json() if response.status_code == 200 else None
+        # Primary limits are a 403 with no remaining quota, secondary limits send Retry-After
+        rate_limited = (
+            response.status_code == 429 or
+            (response.status_code == 403 and (response.headers.get('X-RateLimit-Remaining') == '0' or
+                                              'Retry-After' in response.headers)) or
+            (data is not None and any(error.get('type') == 'RATE_LIMITED' for error in data.get('errors', [])))
+        )
+        if rate_limited and attempt < retries:
+            delay = _retry_delay(response, attempt)
+            print(f"Rate limited by GitHub, retrying in {delay:.0f}s")
+            time.sleep(delay)
+            continue
+
+        if response.status_code != 200:
+            print(f"Error fetching data: {response.status_code}")
+            print(response.text)
+            return None
+        return data
+
+    return None
+
+def _retry_delay(response, attempt):
+    """Seconds to wait before retrying a rate-limited request"""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after and retry_after.isdigit():
+        return min(MAX_BACKOFF, int(retry_after))
+    reset = response.headers.get('X-RateLimit-Reset')
+    if reset and reset.isdigit() and response.headers.get('X-RateLimit-Remaining') == '0':
+        return min(MAX_BACKOFF, max(1, int(reset) - int(time.time())))
+    return min(MAX_BACKOFF, 2 ** attempt)
+
+def fetch_contributions(username, token, from_date=None, to_date=None):
+    """Fetch contribution data from GitHub GraphQL API
+
+    Without dates this is the default one-year calendar; with from_date and
+    to_date (dates, at most a year apart) only that range is fetched.
+    """
+    if from_date is not None:
+        query = RANGE_QUERY
+        variables = {
+            'username': username,
+            'from': f"{from_date.isoformat()}T00:00:00Z",
+            'to': f"{to_date.isoformat()}T23:59:59Z"
+        }
+    else:
+        query = CALENDAR_QUERY
+        variables = {'username': username}
+
+    data = post_graphql(query, variables, token)
+    if data is None:
         return None
-        
-    data = response.json()
-    
+
     if 'errors' in data:
         print(f"GraphQL errors: {data['errors']}")
         return None
-        
+
     return data['data']['user']['contributionsCollection']['contributionCalendar']['weeks']
 
+def fetch_contributions_many(usernames, token):
+    """Fetch the default calendars of several users in one aliased GraphQL query
+
+    Returns a dict of username to weeks; users that could not be fetched map to None.
+    """
+    variables = {f"u{i}": username for i, username in enumerate(usernames)}
+    declarations = ", ".join(f"$u{i}: String!" for i in range(len(usernames)))
+    selections = "".join(
+        f"u{i}: user(login: $u{i}) {{ contributionsCollection {{{CALENDAR_FIELDS}}} }}\n"
+        for i in range(len(usernames))
+    )
+    query = f"query({declarations}) {{\n{selections}}}"
+
+    data = post_graphql(query, variables, token)
+    if data is None:
+        return {username: None for username in usernames}
+
+    # Unknown users come back as null alongside per-alias errors; the rest still succeed
+    for error in data.get('errors', []):
+        print(f"GraphQL error: {error.get('message', error)}")
+
+    results = {}
+    users = data.get('data') or {}
+    for i, username in enumerate(usernames):
+        user = users.get(f"u{i}")
+        results[username] = user['contributionsCollection']['contributionCalendar']['weeks'] if user else None
+    return results
+
+def merge_contribution_weeks(stored_weeks, fetched_weeks, years=1):
+    """Merge freshly fetched days into a stored calendar
+
+    Fetched days replace stored days with the same date, and the result is
+    trimmed to the `years` ending at the latest day and regrouped into
+    Sunday-based weeks like the API returns, starting with a full week.
+    """
+    days = {}
+    for weeks in (stored_weeks, fetched_weeks):
+        for week in weeks:
+            for day in week['contributionDays']:
+                days[day['date']] = day
+    if not days:
+        return []
+
+    start = sunday_before(date.fromisoformat(max(days)) - timedelta(days=365 * years))
+
+    merged = []
+    current_week = None
+    for day_key in sorted(days):
+        day_date = date.fromisoformat(day_key)
+        if day_date < start:
+            continue
+        week_start = sunday_before(day_date)
+        if week_start != current_week:
+            current_week = week_start
+            merged.append({'contributionDays': []})
+        merged[-1]['contributionDays'].append(days[day_key])
+    return merged
+
+def fetch_contribution_history(username, token, from_date, to_date):
+    """Fetch a calendar spanning any date range, one range query per year"""
+    weeks = []
+    chunk_start = from_date
+    while chunk_start <= to_date:
+        chunk_end = min(to_date, chunk_start + timedelta(days=364))
+        fetched = fetch_contributions(username, token, chunk_start, chunk_end)
+        if fetched is None:
+            return None
+        weeks.extend(fetched)
+        chunk_start = chunk_end + timedelta(days=1)
+    return weeks
+
+class ContributionStore:
+    """Local store of the last fetched contribution calendar per user"""
+
+    def __init__(self, store_dir=None):
+        """Use the configured store directory unless one is given"""
+        if store_dir is None:
+            store_dir = os.getenv('SNAKE_STORE_DIR', SNAKE_CONFIG['store_dir'])
+        self.store_dir = Path(store_dir) if store_dir else None
+
+    def _path(self, username):
+        return self.store_dir / f"{username.lower()}.json"
+
+    def load(self, username):
+        """Return the stored calendar weeks for a user, or None"""
+        if self.store_dir is None:
+            return None
+        try:
+            with open(self._path(username), encoding='utf-8') as f:
+                return json.load(f)['weeks']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, username, weeks):
+        """Persist a user's calendar weeks"""
+        if self.store_dir is None:
+            return
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(username)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'username': username, 'weeks': weeks}, f)
+        tmp_path.replace(path)
+
+def calendar_span(weeks):
+    """Return the (first, last) dates of a calendar, or None when it has no days"""
+    days = [day['date'] for week in weeks or [] for day in week['contributionDays']]
+    if not days:
+        return None
+    return date.fromisoformat(min(days)), date.fromisoformat(max(days))
+
+def covers_history(weeks, history_start):
+    """Whether a stored calendar reaches back far enough to only fetch its latest days"""
+    span = calendar_span(weeks)
+    return span is not None and span[0] <= history_start + timedelta(days=REFRESH_DAYS)
+
+def sync_contributions(username, token, store=None, today=None, years=None):
+    """Fetch a user's calendar, only requesting the days that can have changed since the last run
+
+    Covers the last `years` years (default: SNAKE_CONFIG['years']). Falls back to a
+    full fetch when nothing usable is stored or the stored history is too short.
+    """
+    store = store or ContributionStore()
+    today = today or datetime.now(timezone.utc).date()
+    years = years or SNAKE_CONFIG['years']
+    history_start = sunday_before(today - timedelta(days=365 * years))
+    stored_weeks = store.load(username)
+
+    if covers_history(stored_weeks, history_start):
+        last_day = calendar_span(stored_weeks)[1]
+        # Everything since the last stored day is fetched, one range query per year if it is stale
+        from_date = max(last_day - timedelta(days=REFRESH_DAYS), history_start)
+        print(f"Fetching contributions from {from_date.isoformat()} to {today.isoformat()}")
+        fetched_weeks = fetch_contribution_history(username, token, from_date, today)
+        if fetched_weeks is None:
+            return None
+        weeks = merge_contribution_weeks(stored_weeks, fetched_weeks, years)
+        store.save(username, weeks)
+        return weeks
+
+    if years > 1:
+        print(f"Fetching {years} years of contributions from {history_start.isoformat()}")
+        weeks = fetch_contribution_history(username, token, history_start, today)
+        if weeks:
+            weeks = merge_contribution_weeks([], weeks, years)
+    else:
+        weeks = fetch_contributions(username, token)
+    if weeks:
+        store.save(username, weeks)
+    return weeks
+
+def sync_contributions_many(usernames, token, store=None, today=None, years=None):
+    """Batch counterpart of sync_contributions: fetch several users' calendars with one aliased query
+
+    The query returns each user's last year, which is merged into their stored
+    history when `years` (default: SNAKE_CONFIG['years']) asks for more; users
+    whose stored history is too short or too old are synced one by one. Returns
+    a dict of username to weeks, None for users that could not be fetched.
+    """
+    store = store or ContributionStore()
+    today = today or datetime.now(timezone.utc).date()
+    years = years or SNAKE_CONFIG['years']
+    history_start = sunday_before(today - timedelta(days=365 * years))
+
+    results = {}
+    for username, weeks in fetch_contributions_many(usernames, token).items():
+        if weeks and years > 1:
+            stored_weeks = store.load(username)
+            # A history last stored before the fetched year would leave a gap, so it is synced on its own
+            if (not covers_history(stored_weeks, history_start) or
+                    calendar_span(weeks)[0] > calendar_span(stored_weeks)[1] + timedelta(days=1)):
+                results[username] = sync_contributions(username, token, store, today, years)
+                continue
+            weeks = merge_contribution_weeks(stored_weeks, weeks, years)
+        if weeks:
+            store.save(username, weeks)
+        results[username] = weeks
+    return results
+
 def process_contribution_data(weeks_data):
-    """Process raw contribution data into a grid format"""
-    grid = []
-    max_contributions = 0
-    
-    for week in weeks_data:
-        week_data = []
-        for day in week['contributionDays']:
-            count = day['contributionCount']
-            max_contributions = max(max_contributions, count)
-            week_data.append({
-                'count': count,
-                'date': day['date'],
-                'level': min(4, count // max(1, max_contributions // 4)) if max_contributions > 0 else 0
-            })
-        grid.append(week_data)
-    
-    return grid, max_contributions
+    """Process raw contribution data into a compact grid
+
+    Returns the ContributionGrid and the largest daily count.
+    """
+    grid = ContributionGrid.from_weeks(weeks_data)
+    return grid, grid.max_count
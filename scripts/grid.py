@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Compact contribution grid for GitHub Contribution Snake
+Stores a calendar of any length as flat count and level arrays plus a start
+date, instead of one dict per day, so multi-year and aggregated calendars stay small
+"""
+
+import math
+import sys
+from array import array
+from bisect import bisect_right
+from datetime import date, timedelta
+from .config import SNAKE_CONFIG
+
+DAYS_PER_WEEK = 7
+
+LEVEL_STRATEGIES = ('linear', 'quartile', 'log')
+
+def loaded_numpy():
+    """Return NumPy if something in this process already imported it, else None
+
+    Bucketing even a long calendar takes a few milliseconds in pure Python, far
+    less than importing NumPy, so it is only used once it is loaded anyway (for
+    example by the GIF raster backend). Both paths give identical levels.
+    """
+    return sys.modules.get('numpy')
+
+def level_thresholds(counts, strategy='linear'):
+    """Aggregate phase of level bucketing: the four minimum counts for levels 1-4
+
+    linear:   equal-width buckets up to the largest count
+    quartile: quartiles of the non-zero counts, like GitHub's own calendar
+    log:      equal-width buckets on a log scale, so a few huge days don't flatten the rest
+    """
+    if strategy not in LEVEL_STRATEGIES:
+        raise ValueError(f"Unknown level strategy: {strategy}")
+    max_count = max(counts, default=0)
+    if max_count == 0:
+        return [1, 1, 1, 1]
+
+    if strategy == 'linear':
+        width = max(1, max_count // 4)
+        return [width, 2 * width, 3 * width, 4 * width]
+
+    if strategy == 'quartile':
+        numpy = loaded_numpy()
+        if numpy is not None:
+            values = numpy.sort(numpy.asarray(counts)[numpy.asarray(counts) > 0])
+        else:
+            values = sorted(count for count in counts if count > 0)
+        # Nearest-rank quartiles; a day above a quartile moves up a level
+        n = len(values)
+        return [1] + [int(values[(n - 1) * k // 4]) + 1 for k in (1, 2, 3)]
+
+    # Small maximums put the lower log steps under one; clamp them so the thresholds stay sorted
+    scale = math.log1p(max_count)
+    return [1] + [max(1, math.expm1(scale * k / 4)) for k in (1, 2, 3)]
+
+def bucket_levels(counts, thresholds):
+    """Bucket phase of level bucketing: levels 0-4 for every count at once"""
+    numpy = loaded_numpy()
+    if numpy is not None:
+        levels = numpy.searchsorted(numpy.asarray(thresholds, dtype=float), numpy.asarray(counts), side='right')
+        return bytearray(levels.astype(numpy.uint8).tobytes())
+    # Counts repeat a lot, so bucket each distinct value once
+    table = {count: bisect_right(thresholds, count) for count in set(counts)}
+    return bytearray(map(table.__getitem__, counts))
+
+def sunday_before(day_date):
+    """Return the Sunday on or before a date"""
+    return day_date - timedelta(days=(day_date.weekday() + 1) % 7)
+
+class GridCell:
+    """Read-only view of one day, indexable like the old per-day dicts"""
+
+    __slots__ = ('count', 'level', 'date')
+
+    def __init__(self, count, level, day):
+        self.count = count
+        self.level = level
+        self.date = day
+
+    def __getitem__(self, key):
+        if key == 'date':
+            return self.date.isoformat()
+        return getattr(self, key)
+
+class GridColumn:
+    """Read-only view of one week of a ContributionGrid"""
+
+    __slots__ = ('grid', 'col')
+
+    def __init__(self, grid, col):
+        self.grid = grid
+        self.col = col
+
+    def __len__(self):
+        return self.grid.column_length(self.col)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return self.grid.cell(self.col, row)
+
+class ContributionGrid:
+    """Calendar of daily contribution counts laid out as weeks (columns) of days (rows)
+
+    Column 0 starts on the Sunday on or before the first day, so every day sits
+    on its weekday's row. Only the last column may be shorter than a full week.
+    ``grid[col][row]['count']`` still works through lightweight views, but
+    consumers should prefer count(), level() and column_length().
+    """
+
+    def __init__(self, start, counts, length=None):
+        """Wrap day counts starting at the Sunday `start`; `length` trims trailing days"""
+        self.start = start
+        self.counts = array('I', counts)
+        self.length = len(self.counts) if length is None else length
+        del self.counts[self.length:]
+        self.max_count = max(self.counts, default=0)
+        self.assign_levels()
+
+    @classmethod
+    def from_days(cls, days):
+        """Build a grid from (date, count) pairs in any order; missing days count as zero"""
+        days = dict(days)
+        if not days:
+            return cls(date.today(), [])
+        start = sunday_before(min(days))
+        length = (max(days) - start).days + 1
+        counts = array('I', bytes(4 * length))
+        for day, count in days.items():
+            counts[(day - start).days] += count
+        return cls(start, counts)
+
+    @classmethod
+    def from_weeks(cls, weeks_data):
+        """Build a grid from GraphQL contribution calendar weeks"""
+        return cls.from_days(
+            (date.fromisoformat(day['date']), day['contributionCount'])
+            for week in weeks_data for day in week['contributionDays']
+        )
+
+    @classmethod
+    def aggregate(cls, grids):
+        """Sum several grids day by day, e.g. into one calendar for an organization"""
+        days = {}
+        for grid in grids:
+            for day, count in grid.days():
+                days[day] = days.get(day, 0) + count
+        return cls.from_days(days.items())
+
+    def assign_levels(self, strategy=None):
+        """Bucket every count into levels 0-4 (default strategy: SNAKE_CONFIG['level_strategy'])"""
+        strategy = strategy or SNAKE_CONFIG['level_strategy']
+        self.levels = bucket_levels(self.counts, level_thresholds(self.counts, strategy))
+
+    def __len__(self):
+        """Number of week columns"""
+        return -(-self.length // DAYS_PER_WEEK)
+
+    def __bool__(self):
+        return self.length > 0
+
+    def __getitem__(self, col):
+        if col < 0:
+            col += len(self)
+        if not 0 <= col < len(self):
+            raise IndexError(col)
+        return GridColumn(self, col)
+
+    def __iter__(self):
+        return (GridColumn(self, col) for col in range(len(self)))
+
+    @property
+    def cols(self):
+        return len(self)
+
+    @property
+    def rows(self):
+        """Rows of the tallest column"""
+        return min(DAYS_PER_WEEK, self.length)
+
+    def column_length(self, col):
+        """Number of days stored in a column"""
+        return max(0, min(DAYS_PER_WEEK, self.length - col * DAYS_PER_WEEK))
+
+    def count(self, col, row):
+        return self.counts[col * DAYS_PER_WEEK + row]
+
+    def level(self, col, row):
+        return self.levels[col * DAYS_PER_WEEK + row]
+
+    def date(self, col, row):
+        return self.start + timedelta(days=col * DAYS_PER_WEEK + row)
+
+    def cell(self, col, row):
+        i = col * DAYS_PER_WEEK + row
+        return GridCell(self.counts[i], self.levels[i], self.start + timedelta(days=i))
+
+    def days(self):
+        """Yield every stored day as (date, count)"""
+        for i, count in enumerate(self.counts):
+            yield self.start + timedelta(days=i), count
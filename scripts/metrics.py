@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Run instrumentation for GitHub Contribution Snake
+Records each pipeline stage as a span with its duration, peak resident memory
+and stage-specific counts, written as JSON lines, with optional cProfile or
+tracemalloc profiling of the whole run
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from .config import SNAKE_CONFIG
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+PROFILERS = ('cprofile', 'tracemalloc')
+
+def reset_peak_rss():
+    """Reset the process's peak RSS so the next reading covers only what follows (Linux only)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def peak_rss_kib():
+    """Return the peak resident set size in KiB, or None if it can't be read"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+class RunMetrics:
+    """Collects stage spans for one generation run and writes them as JSON lines
+
+    Each line holds the run id, stage name, start time, duration, peak RSS and
+    whatever counts the stage attached. Spans must not be nested, since each
+    one resets the peak RSS reading. The metrics file (default:
+    SNAKE_CONFIG['metrics_file'], overridden by SNAKE_METRICS) is appended to
+    across runs and lives outside the output directory, which gets published;
+    '-' writes to stdout and '' disables it. Profiler reports are written next
+    to the metrics file (or to the current directory without one).
+    """
+
+    def __init__(self, username, output_dir, metrics_file=None, profiler=None):
+        """Open the metrics file and start the profiler (default: SNAKE_PROFILE), if any"""
+        if metrics_file is None:
+            metrics_file = os.getenv('SNAKE_METRICS', SNAKE_CONFIG['metrics_file'])
+        if profiler is None:
+            profiler = os.getenv('SNAKE_PROFILE') or None
+        if profiler and profiler not in PROFILERS:
+            print(f"Warning: ignoring unknown SNAKE_PROFILE value: {profiler}")
+            profiler = None
+
+        self.username = username
+        self.output_dir = Path(output_dir)
+        self.run_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S.%fZ')
+        self.spans = []
+        self.profiler = profiler
+        self._profile = None
+        self._started = time.perf_counter()
+
+        self.output = None
+        self.report_dir = Path('.')
+        if metrics_file == '-':
+            self.output = sys.stdout
+        elif metrics_file:
+            metrics_path = Path(metrics_file)
+            metrics_path.parent.mkdir(parents=True, exist_ok=True)
+            self.output = open(metrics_path, 'a', encoding='utf-8')
+            self.report_dir = metrics_path.parent
+
+        if profiler == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif profiler == 'tracemalloc':
+            tracemalloc.start()
+
+    @contextmanager
+    def span(self, stage, **counts):
+        """Time a stage; the yielded dict collects counts to record with it"""
+        counts = dict(counts)
+        reset_peak_rss()
+        if self.profiler == 'tracemalloc':
+            tracemalloc.reset_peak()
+        started_at = datetime.now(timezone.utc).isoformat()
+        start = time.perf_counter()
+        try:
+            yield counts
+        finally:
+            record = {
+                'run': self.run_id,
+                'user': self.username,
+                'stage': stage,
+                'start': started_at,
+                'seconds': round(time.perf_counter() - start, 4),
+                'peak_rss_kib': peak_rss_kib()
+            }
+            if self.profiler == 'tracemalloc':
+                record['traced_peak_kib'] = tracemalloc.get_traced_memory()[1] // 1024
+            record.update(counts)
+            self._emit(record)
+
+    def _emit(self, record):
+        self.spans.append(record)
+        if self.output:
+            self.output.write(json.dumps(record) + "\n")
+            self.output.flush()
+
+    def close(self, **counts):
+        """Record the whole run as a 'total' span and write any profiler report next to the outputs"""
+        peaks = [span['peak_rss_kib'] for span in self.spans] + [peak_rss_kib()]
+        peaks = [peak for peak in peaks if peak is not None]
+        self._emit({
+            'run': self.run_id,
+            'user': self.username,
+            'stage': 'total',
+            'output': str(self.output_dir),
+            'seconds': round(time.perf_counter() - self._started, 4),
+            'peak_rss_kib': max(peaks) if peaks else None,
+            **counts
+        })
+
+        if self.profiler:
+            self.report_dir.mkdir(parents=True, exist_ok=True)
+        if self._profile:
+            self._profile.disable()
+            profile_path = self.report_dir / f'profile-{self.username}.pstats'
+            self._profile.dump_stats(profile_path)
+            print(f"cProfile stats saved to: {profile_path}")
+            pstats.Stats(self._profile).sort_stats('cumulative').print_stats(15)
+        elif self.profiler == 'tracemalloc':
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            report_path = self.report_dir / f'tracemalloc-{self.username}.txt'
+            with open(report_path, 'w', encoding='utf-8') as f:
+                for stat in snapshot.statistics('lineno')[:25]:
+                    f.write(f"{stat}\n")
+            print(f"tracemalloc report saved to: {report_path}")
+
+        if self.output and self.output is not sys.stdout:
+            self.output.close()
+        self.output = None
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Content-addressed render cache for GitHub Contribution Snake
+Rendered files are stored under a hash of the processed contribution grid and
+the render settings, so unchanged calendars skip planning and rendering
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from datetime import date
+from .config import SNAKE_CONFIG, COLORS
+from .grid import ContributionGrid
+
+# Bump when a renderer change alters output for identical input
+CACHE_VERSION = 2
+
+# Bump when a planner change alters paths for identical input
+PATH_CACHE_VERSION = 1
+
+# SNAKE_CONFIG keys that change how work is done but not what is rendered
+NON_RENDER_KEYS = {'workers', 'cache_dir', 'cache_max_entries', 'store_dir', 'batch_size', 'fetch_concurrency',
+                   'years', 'metrics_file', 'raster_backend'}
+
+def grid_digest(grid):
+    """Hash the processed contribution grid"""
+    digest = hashlib.sha256()
+    digest.update(f"{grid.start.isoformat()}:{grid.length};".encode())
+    digest.update(grid.counts.tobytes())
+    digest.update(bytes(grid.levels))
+    return digest.hexdigest()
+
+def _last_used(path):
+    """Modification time of a cache entry, or 0 if another process just removed it"""
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0
+
+def evict_least_recent(directory, max_entries):
+    """Remove the least recently used entries of a cache directory beyond max_entries"""
+    entries = sorted(directory.iterdir(), key=_last_used, reverse=True)
+    for stale in entries[max_entries:]:
+        if stale.is_dir():
+            shutil.rmtree(stale, ignore_errors=True)
+        else:
+            stale.unlink(missing_ok=True)
+
+class DiskCache:
+    """Base for caches stored under the configured cache directory"""
+
+    def __init__(self, cache_dir=None, max_entries=None):
+        """Use the configured cache directory unless one is given"""
+        if cache_dir is None:
+            cache_dir = os.getenv('SNAKE_CACHE_DIR', SNAKE_CONFIG['cache_dir'])
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_entries = max_entries or SNAKE_CONFIG['cache_max_entries']
+
+    @property
+    def enabled(self):
+        return self.cache_dir is not None
+
+class RenderCache(DiskCache):
+    """On-disk cache of rendered artifacts with least-recently-used eviction
+
+    Every user's artifacts are kept and evicted on their own, so a batch of
+    many users doesn't push everyone out of a shared cache, and parallel
+    workers never evict each other's entries.
+    """
+
+    def __init__(self, name, cache_dir=None, max_entries=None):
+        """Keep the artifacts rendered for `name` (a username) in their own directory"""
+        super().__init__(cache_dir, max_entries)
+        self.name = name.lower()
+
+    def key(self, grid_hash, kind, theme):
+        """Return the cache key for one artifact of a grid"""
+        render_config = {k: v for k, v in SNAKE_CONFIG.items() if k not in NON_RENDER_KEYS}
+        material = json.dumps({
+            'version': CACHE_VERSION,
+            'grid': grid_hash,
+            'kind': kind,
+            'theme': theme,
+            'config': render_config,
+            'colors': COLORS[theme]
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _directory(self):
+        return self.cache_dir / 'renders' / self.name
+
+    def _entry(self, key):
+        return self._directory() / key
+
+    def restore(self, key, files):
+        """Copy a cached artifact's files to their output paths; returns False on a miss"""
+        if not self.enabled:
+            return False
+        entry = self._entry(key)
+        cached = [entry / Path(path).name for path in files]
+        if not all(path.exists() for path in cached):
+            return False
+
+        try:
+            for source, destination in zip(cached, files):
+                shutil.copyfile(source, destination)
+            # Touch the entry so eviction treats it as recently used
+            os.utime(entry)
+        except FileNotFoundError:
+            # Evicted between the check and the copy; render it again
+            return False
+        return True
+
+    def store(self, key, files):
+        """Save freshly rendered files under a key and evict old entries"""
+        if not self.enabled:
+            return
+        entry = self._entry(key)
+        entry.mkdir(parents=True, exist_ok=True)
+        for path in files:
+            shutil.copyfile(path, entry / Path(path).name)
+        os.utime(entry)
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries beyond max_entries"""
+        evict_least_recent(self._directory(), self.max_entries)
+
+class PathCache(DiskCache):
+    """On-disk cache of planned snake paths, so unchanged calendars skip planning"""
+
+    def key(self, grid_hash, seed):
+        """Return the cache key for the path planned over a grid with the current planner settings"""
+        material = json.dumps({
+            'version': PATH_CACHE_VERSION,
+            'grid': grid_hash,
+            'planner': SNAKE_CONFIG['planner'],
+            'seed': seed
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _entry(self, key):
+        return self.cache_dir / 'paths' / f"{key}.json"
+
+    def load(self, key):
+        """Return the cached path as a list of (col, row, count), or None on a miss"""
+        if not self.enabled:
+            return None
+        entry = self._entry(key)
+        try:
+            with open(entry, encoding='utf-8') as f:
+                path = [tuple(move) for move in json.load(f)]
+        except (OSError, ValueError):
+            return None
+        os.utime(entry)
+        return path
+
+    def store(self, key, path):
+        """Save a planned path under a key and evict old entries"""
+        if not self.enabled:
+            return
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(path, f, separators=(',', ':'))
+        tmp_path.replace(entry)
+        evict_least_recent(entry.parent, self.max_entries)
+
+    def _previous_entry(self, name):
+        return self.cache_dir / 'plans' / f"{name.lower()}.json"
+
+    def load_previous(self, name):
+        """Return the last grid and path planned for a user as a dict, or None"""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._previous_entry(name), encoding='utf-8') as f:
+                plan = json.load(f)
+            return {
+                'planner': plan['planner'],
+                'grid': ContributionGrid(date.fromisoformat(plan['start']), plan['counts']),
+                'path': [tuple(move) for move in plan['path']]
+            }
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def store_previous(self, name, grid, path):
+        """Remember the grid and path planned for a user, for replanning on the next run"""
+        if not self.enabled:
+            return
+        entry = self._previous_entry(name)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'planner': SNAKE_CONFIG['planner'],
+                'start': grid.start.isoformat(),
+                'counts': grid.counts.tolist(),
+                'path': path
+            }, f, separators=(',', ':'))
+        tmp_path.replace(entry)
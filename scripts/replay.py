@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Offline replay of stored contribution calendars
+Streams calendars from JSON or NDJSON dumps (or stdin) in the shape the GraphQL
+API returns and renders each one into <output_dir>/<username>/, without a token
+or network access. Records are decoded one at a time and only a bounded number
+are in flight, so memory stays flat however long the archive is.
+"""
+
+import argparse
+import gzip
+import json
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from .config import get_worker_count
+from .batch import render_user
+from .snake_generator import add_output_arguments
+
+# Characters allowed between top-level records: NDJSON newlines and the brackets
+# and commas of a JSON array of records
+RECORD_SEPARATORS = ' \t\r\n,[]'
+
+# Characters read from the input at a time
+READ_CHUNK = 1 << 20
+
+# A record this large without decoding is treated as corrupt input rather than buffered further
+MAX_RECORD_CHARS = 64 << 20
+
+# Names used as output directories; anything else (paths, '..') is rejected
+USERNAME_PATTERN = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.-]*')
+
+def iter_json_records(fp, chunk_size=READ_CHUNK):
+    """Yield the top-level JSON values of a text stream one at a time
+
+    Accepts NDJSON, concatenated JSON values and a JSON array of records, so a
+    dump can be read without loading it whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    while True:
+        while pos < len(buffer) and buffer[pos] in RECORD_SEPARATORS:
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                return
+            buffer, pos = fp.read(chunk_size), 0
+            eof = not buffer
+            continue
+
+        try:
+            record, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Most likely the record continues past the buffer; invalid once the input is exhausted
+            if eof or len(buffer) - pos > MAX_RECORD_CHARS:
+                raise
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield record
+
+def calendar_record(record):
+    """Return (username or None, weeks or None) for one input record
+
+    A record is either {"username": ..., "weeks": [...]} (or "login"), or any
+    part of a GraphQL response down to the contribution calendar, e.g.
+    {"data": {"user": {"login": ..., "contributionsCollection":
+    {"contributionCalendar": {"weeks": [...]}}}}}.
+    """
+    if not isinstance(record, dict):
+        return None, None
+    username = None
+    node = record
+    for key in ('data', 'user', 'contributionsCollection', 'contributionCalendar'):
+        if not isinstance(node, dict):
+            break
+        username = username or node.get('username') or node.get('login')
+        node = node.get(key, node)
+    weeks = node.get('weeks') if isinstance(node, dict) else None
+    return username, weeks if isinstance(weeks, list) else None
+
+def open_source(source):
+    """Open an input file as text; '-' is stdin and .gz files are decompressed"""
+    if source == '-':
+        return sys.stdin
+    if source.endswith('.gz'):
+        return gzip.open(source, 'rt', encoding='utf-8')
+    return open(source, encoding='utf-8')
+
+def replay_records(sources):
+    """Yield (username, weeks, error) for every record in the given files, in order
+
+    Records without a username are named after their file and position.
+    """
+    for source in sources:
+        stem = 'stdin' if source == '-' else Path(source).name.split('.')[0]
+        try:
+            fp = open_source(source)
+        except OSError as e:
+            yield source, None, f"Could not open {source}: {e}"
+            continue
+        try:
+            for index, record in enumerate(iter_json_records(fp), 1):
+                username, weeks = calendar_record(record)
+                username = username or f"{stem}-{index}"
+                if not USERNAME_PATTERN.fullmatch(username):
+                    yield username, None, f"Invalid username in {source} record {index}"
+                elif weeks is None:
+                    yield username, None, f"No contribution calendar in {source} record {index}"
+                else:
+                    yield username, weeks, None
+        except (ValueError, OSError) as e:
+            yield source, None, f"Could not read {source}: {e}"
+        finally:
+            if fp is not sys.stdin:
+                fp.close()
+
+def replay(sources, output_dir="dist", workers=None, formats=None, themes=None):
+    """Render every calendar in the given dumps offline, returning (username, success) per record
+
+    With workers > 1, records are rendered on a process pool with at most two
+    per worker in flight, so only those calendars are held in memory.
+    """
+    workers = workers or get_worker_count()
+    # One entry per record, so repeated usernames are each counted
+    results = []
+
+    def report(username, success, log):
+        results.append((username, success))
+        if success:
+            print(f"  ✔ {username}")
+        else:
+            print(f"  ✖ {username}")
+            print(log)
+
+    print(f"Replaying calendars from {', '.join(sources)} ({workers} render workers)")
+    render_pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    # Pending renders by username
+    in_flight = {}
+
+    def collect(futures):
+        for future in futures:
+            username, success, log = future.result()
+            del in_flight[username]
+            report(username, success, log)
+
+    try:
+        for username, weeks_data, error in replay_records(sources):
+            if error:
+                report(username, False, error)
+                continue
+
+            user_dir = str(Path(output_dir) / username)
+            if not render_pool:
+                report(*render_user(username, None, weeks_data, user_dir, formats, themes))
+                continue
+
+            if username in in_flight:
+                # A later calendar for the same user must not race the earlier one's files
+                collect([in_flight[username]])
+            if len(in_flight) >= workers * 2:
+                done, _ = wait(list(in_flight.values()), return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight[username] = render_pool.submit(render_user, username, None, weeks_data, user_dir,
+                                                     formats, themes)
+
+        collect(list(in_flight.values()))
+    finally:
+        if render_pool:
+            render_pool.shutdown()
+
+    succeeded = sum(1 for _, success in results if success)
+    print(f"Replay complete: {succeeded}/{len(results)} calendars rendered")
+    return results
+
+def main():
+    """Command line entry point: python -m scripts.replay [FILE ...] [--output DIR]"""
+    parser = argparse.ArgumentParser(description="Render stored contribution calendars offline")
+    parser.add_argument('sources', nargs='*', default=['-'],
+                        help="JSON or NDJSON files of calendars, optionally .gz; '-' reads stdin (default)")
+    parser.add_argument('--output', default='dist', help="output directory (one subdirectory per user)")
+    parser.add_argument('--workers', type=int, help="render processes (default: SNAKE_WORKERS)")
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    results = replay(args.sources, args.output, workers=args.workers, formats=args.formats, themes=args.themes)
+    if not results or not all(success for _, success in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Shared animation scene for GitHub Contribution Snake
+Computes the theme- and format-independent parts of the animation once
+(cell layout, when each cell is eaten, where each snake segment is per frame)
+so every output only has to rasterize it with its own colors
+"""
+
+from .config import SNAKE_CONFIG
+
+# Shortest frame delay in ms; browsers slow down GIF frames shorter than this
+MIN_FRAME_DURATION = 20
+
+def fit_durations(durations, budget):
+    """Scale frame durations down to fit a budget, keeping each at least MIN_FRAME_DURATION
+
+    Frames that would drop below the minimum are pinned to it and the rest share
+    what is left. GIF delays are whole centiseconds, so durations are rounded
+    down with the remainder carried to the next frame and the loop stays within
+    the budget.
+    """
+    pinned = set()
+    while True:
+        free = sum(duration for i, duration in enumerate(durations) if i not in pinned)
+        if not free:
+            break
+        scale = (budget - MIN_FRAME_DURATION * len(pinned)) / free
+        short = {i for i, duration in enumerate(durations)
+                 if i not in pinned and duration * scale < MIN_FRAME_DURATION}
+        if not short:
+            break
+        pinned |= short
+
+    fitted = []
+    elapsed = 0
+    written = 0
+    for i, duration in enumerate(durations):
+        elapsed += MIN_FRAME_DURATION if i in pinned else duration * scale
+        end = int(round(elapsed, 6)) // 10 * 10
+        fitted.append(end - written)
+        written = end
+    return fitted
+
+class Scene:
+    """Precomputed simulation of the snake eating the contribution grid"""
+
+    def __init__(self, grid, snake_path):
+        """Simulate the snake over the grid once"""
+        self.grid = grid
+        self.snake_path = snake_path
+        self.rows = grid.rows
+        self.cols = grid.cols
+
+        self.cell_size = SNAKE_CONFIG['cell_size']
+        self.cell_spacing = SNAKE_CONFIG['cell_spacing']
+        self.snake_length = SNAKE_CONFIG['snake_length']
+        self.frame_duration = SNAKE_CONFIG['animation_duration']
+        self.total_frames = len(snake_path) + self.snake_length
+
+        # Drawn cells as (col, row, level)
+        self.cells = []
+        for col in range(self.cols):
+            for row in range(grid.column_length(col)):
+                self.cells.append((col, row, min(4, grid.level(col, row))))
+        self.levels = {(col, row): level for col, row, level in self.cells}
+
+        # Per-frame eaten-set deltas: the non-empty cell the head eats on that frame, if any
+        self.eat_events = [None] * self.total_frames
+        # Frame on which each non-empty cell is eaten
+        self.eat_frames = {}
+        for frame_idx, (col, row, _) in enumerate(snake_path):
+            if self.levels.get((col, row), 0) > 0 and (col, row) not in self.eat_frames:
+                self.eat_frames[(col, row)] = frame_idx
+                self.eat_events[frame_idx] = (col, row)
+
+        # Snake segments per frame as (segment index, col, row, eating), head first
+        self.segments = []
+        for frame_idx in range(self.total_frames):
+            frame_segments = []
+            for i in range(self.snake_length):
+                snake_pos = frame_idx - i
+                if 0 <= snake_pos < len(snake_path):
+                    col, row, contribution_count = snake_path[snake_pos]
+                    # Skip if out of bounds
+                    if col >= self.cols or row >= grid.column_length(col):
+                        continue
+                    frame_segments.append((i, col, row, contribution_count > 0))
+            self.segments.append(frame_segments)
+
+        self.turns = self._turn_indices()
+        
+        # GIF frames as (simulation step, duration in ms), within the configured budgets
+        self.timeline = self._build_timeline(SNAKE_CONFIG['frame_budget'], SNAKE_CONFIG['duration_budget'])
+
+    def _turn_indices(self):
+        """Return the path indices where the snake changes direction, including both ends"""
+        snake_path = self.snake_path
+        if len(snake_path) < 3:
+            return list(range(len(snake_path)))
+
+        indices = [0]
+        for idx in range(1, len(snake_path) - 1):
+            prev_col, prev_row, _ = snake_path[idx - 1]
+            col, row, _ = snake_path[idx]
+            next_col, next_row, _ = snake_path[idx + 1]
+            if (col - prev_col, row - prev_row) != (next_col - col, next_row - row):
+                indices.append(idx)
+        indices.append(len(snake_path) - 1)
+        return indices
+
+    def _downsample(self, frame_budget):
+        """Pick at most frame_budget simulation steps to show as frames
+
+        Steps that eat a contribution are kept while they fit the budget and
+        idle stretches in between are thinned out evenly; otherwise every
+        n-th step is kept, so the snake advances several cells per frame.
+        """
+        frame_budget = max(2, frame_budget)
+        last_step = self.total_frames - 1
+        eat_steps = [step for step, eaten in enumerate(self.eat_events) if eaten]
+        if len(eat_steps) + 2 >= frame_budget:
+            stride = -(-last_step // (frame_budget - 1))
+            return list(range(0, last_step, stride)) + [last_step]
+
+        # The first and last steps are always shown so the loop starts and ends as before
+        keep = set(eat_steps) | {0, last_step}
+        idle_steps = [step for step in range(self.total_frames) if step not in keep]
+        stride = -(-len(idle_steps) // (frame_budget - len(keep)))
+        keep.update(idle_steps[stride - 1::stride])
+        return sorted(keep)
+
+    def _build_timeline(self, frame_budget=None, duration_budget=None):
+        """Return the frames to render as (step, duration in ms)
+
+        Each frame lasts as long as the steps it stands for, so the pace is
+        unchanged when frames are dropped; with a duration budget the whole loop
+        is sped up to fit, down to MIN_FRAME_DURATION per frame, and more frames
+        are dropped when even that would not fit.
+        """
+        if duration_budget:
+            frame_budget = min(frame_budget or self.total_frames, duration_budget // MIN_FRAME_DURATION)
+        if frame_budget and self.total_frames > frame_budget:
+            steps = self._downsample(frame_budget)
+        else:
+            steps = list(range(self.total_frames))
+
+        durations = []
+        for i, step in enumerate(steps):
+            next_step = steps[i + 1] if i + 1 < len(steps) else self.total_frames
+            durations.append((next_step - step) * self.frame_duration)
+
+        if duration_budget and sum(durations) > duration_budget:
+            durations = fit_durations(durations, duration_budget)
+        return list(zip(steps, durations))
+
+    def canvas_size(self, padding):
+        """Return the (width, height) of the grid with the given padding"""
+        width = self.cols * (self.cell_size + self.cell_spacing) - self.cell_spacing + (padding * 2)
+        height = self.rows * (self.cell_size + self.cell_spacing) - self.cell_spacing + (padding * 2)
+        return width, height
+
+    def cell_origin(self, col, row, padding):
+        """Return the top-left pixel of a grid cell"""
+        x = col * (self.cell_size + self.cell_spacing) + padding
+        y = row * (self.cell_size + self.cell_spacing) + padding
+        return x, y
@@ -4,68 +4,294 @@ Main snake generator module
 Orchestrates the entire snake generation process
 """
 
+import argparse
 import sys
+from contextlib import contextmanager
 from pathlib import Path
-from .config import validate_config, get_github_username, get_github_token
-from .github_api import fetch_contributions, process_contribution_data
-from .snake_path import create_snake_path
-from .svg_generator import generate_svg_animation
-from .gif_generator import generate_gif_animation
+from .config import SNAKE_CONFIG, validate_config, get_github_username, get_github_token, get_worker_count
+from .github_api import sync_contributions, process_contribution_data
+from .snake_path import create_snake_path, replan_snake_path, planning_seed
+from .scene import Scene
+from .render_cache import RenderCache, PathCache, grid_digest
+from .metrics import RunMetrics
+
+# The SVG and GIF generators (and the process pool) are imported only when they
+# are used, so an SVG-only run never loads Pillow
+
+# Every generated file as (format, theme, filename)
+OUTPUTS = [
+    ('svg', 'light', 'github-contribution-grid-snake.svg'),
+    ('svg', 'dark', 'github-contribution-grid-snake-dark.svg'),
+    ('gif', 'dark', 'github-contribution-grid-snake.gif'),
+    ('gif', 'light', 'github-contribution-grid-snake-light.gif'),
+    ('webp', 'dark', 'github-contribution-grid-snake.webp'),
+    ('webp', 'light', 'github-contribution-grid-snake-light.webp'),
+    ('apng', 'dark', 'github-contribution-grid-snake.png'),
+    ('apng', 'light', 'github-contribution-grid-snake-light.png')
+]
+
+FORMATS = ('svg', 'gif', 'webp', 'apng')
+THEMES = ('light', 'dark')
+
+# Formats generated unless others are requested
+DEFAULT_FORMATS = ('svg', 'gif')
+
+# Animated raster formats, all encoded from the same delta frames
+RASTER_FORMATS = ('gif', 'webp', 'apng')
+
+FORMAT_NAMES = {'svg': 'SVG', 'gif': 'GIF', 'webp': 'WebP', 'apng': 'APNG'}
+
+def select_outputs(formats=None, themes=None):
+    """Return the OUTPUTS entries for the given formats (default: SVG and GIF) and themes (default: both)"""
+    formats = list(formats or DEFAULT_FORMATS)
+    themes = list(themes or THEMES)
+    unknown = [value for value in formats if value not in FORMATS] + [value for value in themes if value not in THEMES]
+    if unknown:
+        raise ValueError(f"Unknown output format or theme: {', '.join(unknown)}")
+    return [output for output in OUTPUTS if output[0] in formats and output[1] in themes]
+
+def comma_list(choices):
+    """Return an argparse type for a comma-separated list of the given choices"""
+    def parse(value):
+        values = [item.strip() for item in value.split(',') if item.strip()]
+        unknown = [item for item in values if item not in choices]
+        if unknown or not values:
+            raise argparse.ArgumentTypeError(f"expected a comma-separated list of {', '.join(choices)}")
+        return values
+    return parse
+
+def add_output_arguments(parser):
+    """Add the --format and --theme options to a command line parser"""
+    parser.add_argument('--format', dest='formats', type=comma_list(FORMATS),
+                        help=f"comma-separated formats to generate: {', '.join(FORMATS)} "
+                             f"(default: {','.join(DEFAULT_FORMATS)})")
+    parser.add_argument('--theme', dest='themes', type=comma_list(THEMES),
+                        help=f"comma-separated themes to generate: {', '.join(THEMES)} (default: all)")
+
+def output_files(fmt, path):
+    """Return every file written for one output, including optional side files"""
+    if fmt == 'svg' and SNAKE_CONFIG['svgz']:
+        return [path, path.with_suffix('.svgz')]
+    return [path]
+
+def output_counts(outputs, scene):
+    """Return the file, frame and byte counts recorded for a rendering stage"""
+    return {
+        'files': len(outputs),
+        'frames': len(scene.timeline),
+        'bytes': sum(Path(path).stat().st_size for path, _ in outputs)
+    }
+
+def raster_renderer(fmt, theme):
+    """Import a raster format's generator and return (generate_animation, frame encoder for the theme)"""
+    if fmt == 'webp':
+        from .webp_generator import generate_webp_animation, webp_frame_encoder
+        return generate_webp_animation, webp_frame_encoder(theme)
+    if fmt == 'apng':
+        from .apng_generator import generate_apng_animation, apng_frame_encoder
+        return generate_apng_animation, apng_frame_encoder(theme)
+    from .gif_generator import generate_gif_animation, encode_gif_frame
+    return generate_gif_animation, encode_gif_frame
+
+def webp_supported():
+    """Whether the installed Pillow can encode WebP"""
+    from PIL import features
+    return features.check('webp')
 
 class ContributionSnake:
     """Main class for generating GitHub contribution snake animations"""
     
-    def __init__(self, username=None, token=None):
-        """Initialize the snake generator with GitHub credentials"""
+    def __init__(self, username=None, token=None, workers=None, formats=None, themes=None, offline=False):
+        """Initialize the snake generator with GitHub credentials and the formats and themes to generate
+
+        Offline generators only render calendars they are given and need no token.
+        """
         self.username = username or get_github_username()
-        self.token = token or get_github_token()
+        self.token = token or (None if offline else get_github_token())
+        self.workers = workers or get_worker_count()
+        self.outputs = select_outputs(formats, themes)
+        if any(fmt == 'webp' for fmt, _, _ in self.outputs) and not webp_supported():
+            print("Warning: Pillow was built without WebP support, skipping WebP outputs")
+            self.outputs = [output for output in self.outputs if output[0] != 'webp']
         
-        if not self.username or not self.token:
+        if not self.username or not (self.token or offline):
             raise ValueError("GitHub username and token are required")
     
-    def generate_all(self, output_dir="dist"):
-        """Generate all snake animations (SVG light/dark and GIF)"""
-        # Create output directory
-        output_path = Path(output_dir)
-        output_path.mkdir(exist_ok=True)
-        
-        # Fetch and process contribution data
-        print(f"Fetching contributions for user: {self.username}")
-        weeks_data = fetch_contributions(self.username, self.token)
-        
-        if not weeks_data:
-            print("Failed to fetch contribution data")
+    @contextmanager
+    def _run_metrics(self, output_dir, metrics):
+        """Yield the run's metrics, starting a run (and closing it afterwards) if none is in progress"""
+        if metrics is not None:
+            yield metrics
+            return
+        metrics = RunMetrics(self.username, output_dir)
+        try:
+            yield metrics
+        finally:
+            metrics.close()
+    
+    def generate_all(self, output_dir="dist", metrics=None):
+        """Generate the selected snake animations (default: SVG and GIF, light and dark)"""
+        if not self.token:
+            print("A GitHub token is required to fetch contributions")
             return False
         
-        grid, max_contributions = process_contribution_data(weeks_data)
-        print(f"Processed contribution grid: {len(grid)} weeks, max contributions: {max_contributions}")
-        
-        # Create snake path
-        snake_path = create_snake_path(grid)
-        
-        if not snake_path:
-            print("Failed to create snake path")
-            return False
+        with self._run_metrics(output_dir, metrics) as metrics:
+            # Fetch and process contribution data
+            print(f"Fetching contributions for user: {self.username}")
+            with metrics.span('fetch') as span:
+                weeks_data = sync_contributions(self.username, self.token)
+                span['weeks'] = len(weeks_data or [])
+            
+            if not weeks_data:
+                print("Failed to fetch contribution data")
+                return False
+            
+            return self.generate_from_weeks(weeks_data, output_dir, metrics)
+    
+    def generate_from_weeks(self, weeks_data, output_dir="dist", metrics=None):
+        """Plan and render the selected snake animations from an already fetched calendar"""
+        with self._run_metrics(output_dir, metrics) as metrics:
+            with metrics.span('process') as span:
+                grid, max_contributions = process_contribution_data(weeks_data)
+                span.update(weeks=len(grid), days=grid.length, max_contributions=max_contributions)
+            print(f"Processed contribution grid: {len(grid)} weeks, max contributions: {max_contributions}")
+            
+            return self.generate_from_grid(grid, output_dir, metrics)
+    
+    def generate_from_grid(self, grid, output_dir="dist", metrics=None):
+        """Plan and render the selected snake animations from a ContributionGrid"""
+        with self._run_metrics(output_dir, metrics) as metrics:
+            # Create output directory
+            output_path = Path(output_dir)
+            output_path.mkdir(parents=True, exist_ok=True)
+            
+            # Reuse any artifact already rendered for this exact grid and render config
+            with metrics.span('cache_restore') as span:
+                cache = RenderCache(self.username)
+                grid_hash = grid_digest(grid)
+                pending = []
+                for fmt, theme, filename in self.outputs:
+                    path = output_path / filename
+                    files = output_files(fmt, path)
+                    key = cache.key(grid_hash, fmt, theme)
+                    if cache.restore(key, files):
+                        print(f"Reused cached {filename}")
+                        continue
+                    pending.append((fmt, theme == 'dark', path, key, files))
+                span.update(restored=len(self.outputs) - len(pending), pending=len(pending))
+            
+            if not pending:
+                print("Contribution data unchanged, all animations restored from cache")
+                return True
+            
+            # Create snake path, reusing the one planned for this grid on an earlier run
+            with metrics.span('plan') as span:
+                seed = planning_seed(grid)
+                path_cache = PathCache()
+                path_key = path_cache.key(grid_hash, seed)
+                snake_path = path_cache.load(path_key)
+                span['cached'] = snake_path is not None
+                span['replanned'] = False
+                if snake_path is not None:
+                    print(f"Reused cached snake path: {len(snake_path)} moves")
+                else:
+                    # Only re-route the part of the last run's path that reaches changed days
+                    previous = path_cache.load_previous(self.username) if SNAKE_CONFIG['replan'] else None
+                    if previous and previous['planner'] == SNAKE_CONFIG['planner'] == 'greedy':
+                        snake_path = replan_snake_path(grid, previous['grid'], previous['path'], seed)
+                        span['replanned'] = snake_path is not None
+                    if snake_path is None:
+                        snake_path = create_snake_path(grid, seed=seed)
+                        # Only from-scratch plans are cached per grid; a replanned path depends on history
+                        if snake_path:
+                            path_cache.store(path_key, snake_path)
+                if snake_path:
+                    path_cache.store_previous(self.username, grid, snake_path)
+                span.update(cells=grid.length, moves=len(snake_path))
+            
+            if not snake_path:
+                print("Failed to create snake path")
+                return False
+            
+            # Simulate the animation once; each theme and format only rasterizes it
+            with metrics.span('scene') as span:
+                scene = Scene(grid, snake_path)
+                span.update(steps=scene.total_frames, frames=len(scene.timeline))
+            
+            self._render(pending, grid, snake_path, scene, metrics)
+            
+            with metrics.span('cache_store'):
+                for fmt, dark_mode, path, key, files in pending:
+                    cache.store(key, files)
+            
+            print("Snake generation complete!")
+            return True
+    
+    def _render(self, outputs, grid, snake_path, scene, metrics):
+        """Render the given outputs, rasterizing animation frames on a process pool when workers > 1"""
+        svg_outputs = [(path, dark_mode) for fmt, dark_mode, path, _, _ in outputs if fmt == 'svg']
+        raster_outputs = [(fmt, path, dark_mode) for fmt, dark_mode, path, _, _ in outputs if fmt in RASTER_FORMATS]
         
-        # Generate animations
+        if self.workers > 1 and raster_outputs:
+            from concurrent.futures import ProcessPoolExecutor
+            from .gif_generator import submit_frames
+            print(f"Rendering with {self.workers} worker processes")
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                # Queue every animation's frame chunks up front so all formats and themes
+                # rasterize concurrently while the SVGs are written here
+                frames = [submit_frames(executor, scene, dark_mode, self.workers,
+                                        raster_renderer(fmt, 'dark' if dark_mode else 'light')[1])
+                          for fmt, _, dark_mode in raster_outputs]
+                self._generate_svgs(svg_outputs, grid, snake_path, scene, metrics)
+                self._generate_rasters(raster_outputs, frames, grid, snake_path, scene, metrics)
+        else:
+            self._generate_svgs(svg_outputs, grid, snake_path, scene, metrics)
+            self._generate_rasters(raster_outputs, [None] * len(raster_outputs), grid, snake_path, scene, metrics)
+    
+    def _generate_rasters(self, raster_outputs, frames, grid, snake_path, scene, metrics):
+        """Write the animated raster outputs one format at a time, reporting each format's size and encode time
+
+        `frames` holds each output's frames from submit_frames, or None to render them here.
+        """
+        for fmt in RASTER_FORMATS:
+            selected = [(path, dark_mode, output_frames)
+                        for (output_fmt, path, dark_mode), output_frames in zip(raster_outputs, frames)
+                        if output_fmt == fmt]
+            if not selected:
+                continue
+            
+            generate_animation, _ = raster_renderer(fmt, 'dark')
+            print(f"Generating {FORMAT_NAMES[fmt]} animations...")
+            with metrics.span(fmt, workers=self.workers) as span:
+                for path, dark_mode, output_frames in selected:
+                    generate_animation(grid, snake_path, path, dark_mode=dark_mode, scene=scene, frames=output_frames)
+                span.update(output_counts([(path, dark_mode) for path, dark_mode, _ in selected], scene))
+            record = metrics.spans[-1]
+            print(f"{FORMAT_NAMES[fmt]}: {record['bytes']:,} bytes in {record['seconds']:.2f}s")
+    
+    def _generate_svgs(self, svg_outputs, grid, snake_path, scene, metrics):
+        """Write the SVG animations"""
+        if not svg_outputs:
+            return
+        from .svg_generator import generate_svg_animation
         print("Generating SVG animations...")
-        generate_svg_animation(grid, snake_path, output_path / 'github-contribution-grid-snake.svg', dark_mode=False)
-        generate_svg_animation(grid, snake_path, output_path / 'github-contribution-grid-snake-dark.svg', dark_mode=True)
-        
-        print("Generating GIF animations...")
-        generate_gif_animation(grid, snake_path, output_path / 'github-contribution-grid-snake.gif', dark_mode=True)
-        generate_gif_animation(grid, snake_path, output_path / 'github-contribution-grid-snake-light.gif', dark_mode=False)
-        
-        print("Snake generation complete!")
-        return True
+        with metrics.span('svg') as span:
+            for svg_path, dark_mode in svg_outputs:
+                generate_svg_animation(grid, snake_path, svg_path, dark_mode=dark_mode, scene=scene)
+            span.update(output_counts(svg_outputs, scene))
 
 def main():
     """Main entry point for command line usage"""
+    parser = argparse.ArgumentParser(description="Generate GitHub contribution snake animations")
+    parser.add_argument('output_dir', nargs='?', default='dist', help="directory to write the animations to (default: dist)")
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    
     if not validate_config():
         sys.exit(1)
     
-    snake = ContributionSnake()
-    success = snake.generate_all()
+    snake = ContributionSnake(formats=args.formats, themes=args.themes)
+    success = snake.generate_all(args.output_dir)
     
     if not success:
         sys.exit(1)
@@ -4,31 +4,173 @@ Snake path generation module
 Creates intelligent paths for the snake to follow
 """
 
+import heapq
 import random
+from bisect import bisect_left, insort
+from .config import SNAKE_CONFIG
+from .render_cache import grid_digest
+from .grid import DAYS_PER_WEEK
 
-def create_snake_path(grid):
+PLANNERS = ('greedy', 'sweep')
+
+class TargetIndex:
+    """Column-bucketed spatial index of grid positions for nearest-target lookups"""
+
+    def __init__(self, positions=()):
+        """Build the index from (col, row, count) tuples"""
+        self.buckets = {}
+        self.columns = []
+        self.counts = {}
+        for col, row, count in positions:
+            self.add(col, row, count)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, position):
+        return position in self.counts
+
+    def add(self, col, row, count):
+        """Insert a position into the index"""
+        if (col, row) in self.counts:
+            return
+        self.counts[(col, row)] = count
+        rows = self.buckets.get(col)
+        if rows is None:
+            self.buckets[col] = [row]
+            insort(self.columns, col)
+        else:
+            insort(rows, row)
+
+    def remove(self, col, row):
+        """Remove a position from the index, ignoring positions it doesn't hold"""
+        if self.counts.pop((col, row), None) is None:
+            return
+        rows = self.buckets[col]
+        del rows[bisect_left(rows, row)]
+        if not rows:
+            del self.buckets[col]
+            del self.columns[bisect_left(self.columns, col)]
+
+    def items(self):
+        """Return all indexed positions in column-major order"""
+        return [(col, row, self.counts[(col, row)])
+                for col in self.columns for row in self.buckets[col]]
+
+    def nearest(self, col, row):
+        """Return the (distance, col, row, count) of the nearest position by Manhattan distance
+
+        Ties are broken by lowest column, then lowest row. Returns None if the index is empty.
+        """
+        best = None
+        split = bisect_left(self.columns, col)
+        left, right = split - 1, split
+
+        # Walk outward over non-empty columns until the column gap alone exceeds the best distance
+        while left >= 0 or right < len(self.columns):
+            left_gap = col - self.columns[left] if left >= 0 else None
+            right_gap = self.columns[right] - col if right < len(self.columns) else None
+            if right_gap is None or (left_gap is not None and left_gap <= right_gap):
+                candidate_col, gap = self.columns[left], left_gap
+                left -= 1
+            else:
+                candidate_col, gap = self.columns[right], right_gap
+                right += 1
+
+            if best is not None and gap > best[0]:
+                break
+
+            rows = self.buckets[candidate_col]
+            i = bisect_left(rows, row)
+            for candidate_row in rows[max(0, i - 1):i + 1]:
+                candidate = (gap + abs(candidate_row - row), candidate_col, candidate_row)
+                if best is None or candidate < best:
+                    best = candidate
+
+        if best is None:
+            return None
+        return best + (self.counts[(best[1], best[2])],)
+
+
+def find_route(grid, start, goal, visited, rng=None):
+    """Return the cells after start on a shortest route to goal
+
+    A* over the grid where every cell may be crossed; among the shortest routes
+    the one crossing the fewest visited cells wins, so routes sweep up fresh
+    cells on the way. Remaining ties are broken by rng, if given. The calendar has no holes, so the Manhattan heuristic is
+    exact and the search never expands cells outside the box spanned by start and goal.
+    """
+    goal_col, goal_row = goal
+    column_length = grid.column_length
+    cols = grid.cols
+    
+    def heuristic(col, row):
+        return abs(col - goal_col) + abs(row - goal_row)
+    
+    # Costs are (steps, visited cells crossed), compared lexicographically
+    best = {start: (0, 0)}
+    came_from = {}
+    frontier = [(heuristic(*start), 0, 0, 0, start)]
+    while frontier:
+        _, revisits, steps, _, cell = heapq.heappop(frontier)
+        if cell == goal:
+            break
+        if (steps, revisits) > best[cell]:
+            continue
+        col, row = cell
+        for next_cell in ((col + 1, row), (col - 1, row), (col, row + 1), (col, row - 1)):
+            next_col, next_row = next_cell
+            if not (0 <= next_col < cols and 0 <= next_row < column_length(next_col)):
+                continue
+            cost = (steps + 1, revisits + (next_cell in visited))
+            if next_cell not in best or cost < best[next_cell]:
+                best[next_cell] = cost
+                came_from[next_cell] = cell
+                tiebreak = rng.random() if rng else 0
+                heapq.heappush(frontier, (cost[0] + heuristic(*next_cell), cost[1], cost[0], tiebreak, next_cell))
+    
+    route = []
+    cell = goal
+    while cell != start:
+        route.append(cell)
+        cell = came_from[cell]
+    route.reverse()
+    return route
+
+def planning_seed(grid):
+    """Return the configured planning seed, or one derived from the grid contents"""
+    seed = SNAKE_CONFIG['seed']
+    if seed is None:
+        seed = int(grid_digest(grid)[:16], 16)
+    return seed
+
+def create_snake_path(grid, planner=None, seed=None):
+    """Create a path for the snake to follow through the contribution grid
+
+    planner (default: SNAKE_CONFIG['planner']) is 'greedy', which chases the
+    nearest contribution, or 'sweep', a deterministic serpentine that visits
+    every cell exactly once. The same grid, planner and seed (default:
+    planning_seed()) always give the same path.
+    """
+    planner = planner or SNAKE_CONFIG['planner']
+    if planner == 'sweep':
+        return create_sweep_path(grid)
+    if planner != 'greedy':
+        raise ValueError(f"Unknown planner: {planner}")
+    return create_greedy_path(grid, seed)
+
+def create_greedy_path(grid, seed=None):
     """Create a systematic path for the snake to follow through the entire contribution grid"""
     path = []
     if not grid:
         return path
-        
-    rows = len(grid[0]) if grid else 0
-    cols = len(grid)
     
-    # Create a priority list: contributions first, then empty spaces
-    contributions = []
-    empty_spaces = []
+    rng = random.Random(planning_seed(grid) if seed is None else seed)
     
-    for col in range(cols):
-        for row in range(min(rows, len(grid[col]))):
-            pos = (col, row, grid[col][row]['count'])
-            if grid[col][row]['count'] > 0:
-                contributions.append(pos)
-            else:
-                empty_spaces.append(pos)
-    
-    # Sort contributions by value (highest first)
-    contributions.sort(key=lambda x: x[2], reverse=True)
+    rows = grid.rows
+    cols = grid.cols
+    count = grid.count
+    column_length = grid.column_length
     
     # Choose starting position - start from the beginning of the chart
     # GitHub contribution charts typically start from the first week (leftmost column)
@@ -36,8 +178,8 @@ def create_snake_path(grid):
     
     # Try to start from the leftmost column, preferably top-left (0,0)
     for col in range(min(3, cols)):  # Check first few columns
-        for row in range(min(rows, len(grid[col]))):
-            start_pos = (col, row, grid[col][row]['count'])
+        for row in range(column_length(col)):
+            start_pos = (col, row, count(col, row))
             break
         if start_pos:
             break
@@ -45,182 +187,193 @@ def create_snake_path(grid):
     # Fallback to (0,0) if nothing found
     if not start_pos:
         if cols > 0 and rows > 0:
-            start_pos = (0, 0, grid[0][0]['count'] if len(grid[0]) > 0 else 0)
+            start_pos = (0, 0, count(0, 0) if column_length(0) > 0 else 0)
         else:
             start_pos = (0, 0, 0)
     
-    visited = set()
     path.append(start_pos)
-    visited.add((start_pos[0], start_pos[1]))
+    extend_greedy_path(grid, path, rng)
     
-    def get_valid_moves(col, row):
-        """Get valid adjacent moves (up, down, left, right only)"""
-        moves = []
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]  # up, down, right, left
-        
-        for dc, dr in directions:
-            new_col, new_row = col + dc, row + dr
-            if (0 <= new_col < cols and 
-                0 <= new_row < rows and 
-                new_row < len(grid[new_col]) and
-                (new_col, new_row) not in visited):
-                moves.append((new_col, new_row, grid[new_col][new_row]['count']))
-        return moves
-    
-    def move_towards_target(current_col, current_row, target_col, target_row):
-        """Move one step toward target, return the move or None if blocked"""
-        # Prefer horizontal movement first, then vertical
-        if current_col != target_col:
-            if current_col < target_col:
-                next_col, next_row = current_col + 1, current_row
-            else:
-                next_col, next_row = current_col - 1, current_row
-        elif current_row != target_row:
-            if current_row < target_row:
-                next_col, next_row = current_col, current_row + 1
-            else:
-                next_col, next_row = current_col, current_row - 1
-        else:
-            return None  # Already at target
-        
-        # Check if move is valid
-        if (0 <= next_col < cols and 
-            0 <= next_row < rows and 
-            next_row < len(grid[next_col]) and
-            (next_col, next_row) not in visited):
-            return (next_col, next_row, grid[next_col][next_row]['count'])
-        return None
+    print_path_report(grid, path)
     
-    def find_path_to_nearest_unvisited():
-        """Find path to nearest unvisited contribution or space"""
-        current_col, current_row = path[-1][0], path[-1][1]
-        
-        # First, try to find unvisited contributions
-        unvisited_contributions = [(col, row, count) for col, row, count in contributions 
-                                 if (col, row) not in visited]
-        
-        # If no contributions left, find any unvisited space
-        if not unvisited_contributions:
-            unvisited_spaces = [(col, row, count) for col, row, count in empty_spaces 
-                              if (col, row) not in visited]
-            if unvisited_spaces:
-                # Find nearest unvisited space
-                distances = []
-                for col, row, count in unvisited_spaces:
-                    distance = abs(col - current_col) + abs(row - current_row)
-                    distances.append((distance, col, row, count))
-                distances.sort()
-                if distances:
-                    return distances[0][1], distances[0][2], distances[0][3]
-            return None
-        
-        # Find nearest unvisited contribution
-        distances = []
-        for col, row, count in unvisited_contributions:
-            distance = abs(col - current_col) + abs(row - current_row)
-            distances.append((distance, col, row, count))
-        
-        distances.sort()
-        return distances[0][1], distances[0][2], distances[0][3]
+    return path
+
+def extend_greedy_path(grid, path, rng=None):
+    """Extend a path in place until every cell of the grid has been visited
+
+    Heads for the nearest unvisited contribution (then the nearest unvisited
+    space) along a shortest route each time.
+    """
+    count = grid.count
+    visited = {(col, row) for col, row, _ in path}
     
-    # Main movement loop
-    max_moves = cols * rows * 2  # Prevent infinite loops
-    moves_made = 0
-    stuck_count = 0
+    # Create a priority list: contributions first, then empty spaces
+    contributions = []
+    empty_spaces = []
     
-    while moves_made < max_moves:
-        current_col, current_row = path[-1][0], path[-1][1]
-        
-        # Try to move toward nearest unvisited target
-        target = find_path_to_nearest_unvisited()
-        
-        if target:
-            target_col, target_row, target_count = target
-            next_move = move_towards_target(current_col, current_row, target_col, target_row)
-            
-            if next_move:
-                path.append(next_move)
-                visited.add((next_move[0], next_move[1]))
-                moves_made += 1
-                stuck_count = 0
+    for col in range(grid.cols):
+        for row in range(grid.column_length(col)):
+            if (col, row) in visited:
                 continue
-        
-        # If can't move toward target, try any valid move
-        valid_moves = get_valid_moves(current_col, current_row)
-        
-        if valid_moves:
-            # Prefer moves with contributions
-            contribution_moves = [move for move in valid_moves if move[2] > 0]
-            if contribution_moves:
-                next_move = random.choice(contribution_moves)
-            else:
-                next_move = random.choice(valid_moves)
-            
-            path.append(next_move)
-            visited.add((next_move[0], next_move[1]))
-            moves_made += 1
-            stuck_count = 0
-        else:
-            # Snake is stuck, try to find any unvisited space we can reach
-            stuck_count += 1
-            if stuck_count > 5:
-                break
-            
-            # Look for any unvisited position and try to "tunnel" there
-            all_unvisited = []
-            for col in range(cols):
-                for row in range(min(rows, len(grid[col]))):
-                    if (col, row) not in visited:
-                        all_unvisited.append((col, row, grid[col][row]['count']))
-            
-            if not all_unvisited:
-                break  # Everything visited
-            
-            # Pick a random unvisited position and try to get there
-            target_col, target_row, target_count = random.choice(all_unvisited)
-            
-            # Try to make progress toward it
-            next_move = move_towards_target(current_col, current_row, target_col, target_row)
-            if next_move and (next_move[0], next_move[1]) not in visited:
-                path.append(next_move)
-                visited.add((next_move[0], next_move[1]))
-                moves_made += 1
-                stuck_count = 0
+            pos = (col, row, count(col, row))
+            if pos[2] > 0:
+                contributions.append(pos)
             else:
-                # Really stuck, break out
-                break
+                empty_spaces.append(pos)
+    
+    # Index unvisited targets so nearest lookups and removals stay sub-linear
+    unvisited_contributions = TargetIndex(contributions)
+    unvisited_spaces = TargetIndex(empty_spaces)
     
-    # Add final sweeping motion to ensure we cover more of the grid
-    remaining_unvisited = []
-    for col in range(cols):
-        for row in range(min(rows, len(grid[col]))):
-            if (col, row) not in visited:
-                remaining_unvisited.append((col, row, grid[col][row]['count']))
+    def visit(col, row):
+        """Append a move to the path and drop it from the target indexes"""
+        # A revisited cell has already been eaten
+        path.append((col, row, 0 if (col, row) in visited else count(col, row)))
+        visited.add((col, row))
+        unvisited_contributions.remove(col, row)
+        unvisited_spaces.remove(col, row)
     
-    # Try to visit remaining spaces with a simpler approach
-    while remaining_unvisited and len(remaining_unvisited) > 0:
+    while unvisited_contributions or unvisited_spaces:
         current_col, current_row = path[-1][0], path[-1][1]
+        nearest = unvisited_contributions.nearest(current_col, current_row)
+        if nearest is None:
+            nearest = unvisited_spaces.nearest(current_col, current_row)
         
-        # Find closest unvisited
-        closest = min(remaining_unvisited, 
-                     key=lambda x: abs(x[0] - current_col) + abs(x[1] - current_row))
-        
-        # Try to move one step toward it
-        next_move = move_towards_target(current_col, current_row, closest[0], closest[1])
-        
-        if next_move and (next_move[0], next_move[1]) not in visited:
-            path.append(next_move)
-            visited.add((next_move[0], next_move[1]))
-            remaining_unvisited = [(col, row, count) for col, row, count in remaining_unvisited 
-                                 if (col, row) not in visited]
-        else:
+        for col, row in find_route(grid, (current_col, current_row), (nearest[1], nearest[2]), visited, rng):
+            visit(col, row)
+    
+    return path
+
+def replan_snake_path(grid, previous_grid, previous_path, seed=None):
+    """Update the greedy path planned for an earlier version of the same calendar
+
+    The previous path is kept up to the first move onto a cell whose count
+    has changed, and only the rest is planned again, so a run where just the
+    last few days changed only routes through the cells the old path had not
+    reached yet. Returns None when the previous path can't be reused (the
+    calendar now starts on another week, lost days, or the first cell changed).
+    """
+    if (not grid or not previous_path or previous_grid.start != grid.start or
+            previous_grid.length > grid.length):
+        return None
+    
+    old_counts, new_counts = previous_grid.counts, grid.counts
+    changed = {divmod(i, DAYS_PER_WEEK) for i in range(previous_grid.length) if old_counts[i] != new_counts[i]}
+    
+    keep = len(previous_path)
+    for idx, (col, row, _) in enumerate(previous_path):
+        if (col, row) in changed:
+            keep = idx
             break
+    if keep == 0:
+        return None
+    
+    path = [tuple(move) for move in previous_path[:keep]]
+    rng = random.Random(planning_seed(grid) if seed is None else seed)
+    extend_greedy_path(grid, path, rng)
     
-    total_positions = sum(min(rows, len(grid[col])) for col in range(cols))
-    coverage = len(visited) / total_positions * 100 if total_positions > 0 else 0
-    contributions_found = sum(1 for _, _, count in path if count > 0)
+    print(f"Replanned snake path: kept {keep} moves, planned {len(path) - keep} new ones")
+    print_path_report(grid, path)
+    return path
+
+def _sweep_candidates(grid):
+    """Yield serpentine column sweeps of the grid as lists of (col, row)
+
+    Only the last column may be shorter than a full week; sweeping left to
+    right, it is stitched to the column before it by zigzagging across the pair.
+    """
+    cols = grid.cols
+    column_length = grid.column_length
+    last_length = column_length(cols - 1)
+    ragged = cols > 1 and last_length < column_length(cols - 2)
     
-    print(f"Snake path: {len(path)} moves, visited {len(visited)}/{total_positions} positions ({coverage:.1f}% coverage)")
-    print(f"Found {contributions_found} contributions")
+    def column(col, down):
+        rows = range(column_length(col))
+        return [(col, row) for row in (rows if down else reversed(rows))]
     
+    # Left to right, starting at the top or the bottom of the first column
+    for first_down in (True, False):
+        cells = []
+        down = first_down
+        for col in range(cols - 2 if ragged else cols):
+            cells.extend(column(col, down))
+            down = not down
+        if ragged:
+            pair = (cols - 2, cols - 1)
+            full_rows = range(last_length, column_length(cols - 2))
+            zigzag_rows = range(last_length)
+            if not down:
+                # Climb the part of the full column the last one lacks, then zigzag up both
+                cells.extend((pair[0], row) for row in reversed(full_rows))
+                zigzag_rows = reversed(zigzag_rows)
+            for i, row in enumerate(zigzag_rows):
+                cells.extend((col, row) for col in (pair if i % 2 == 0 else pair[::-1]))
+            if down:
+                cells.extend((pair[0], row) for row in full_rows)
+        yield cells
+    
+    # Right to left, starting at the top or the bottom of the last column
+    for first_down in (True, False):
+        cells = []
+        down = first_down
+        for col in reversed(range(cols)):
+            cells.extend(column(col, down))
+            down = not down
+        yield cells
+
+def _is_full_sweep(cells, total_positions):
+    """Check that a candidate moves one step at a time and visits every cell exactly once"""
+    if len(cells) != total_positions or len(set(cells)) != total_positions:
+        return False
+    return all(abs(col - prev_col) + abs(row - prev_row) == 1
+               for (prev_col, prev_row), (col, row) in zip(cells, cells[1:]))
+
+def create_sweep_path(grid):
+    """Create a deterministic serpentine path that visits every cell of the grid once
+
+    Of the valid sweeps, the one that eats the last contribution earliest is
+    used (then the one that eats contributions earliest overall), so the fewest
+    frames are spent crossing empty cells before the grid is cleared.
+    """
+    if not grid:
+        return []
+    
+    count = grid.count
+    total_positions = sum(grid.column_length(col) for col in range(grid.cols))
+    
+    best = None
+    for cells in _sweep_candidates(grid):
+        if not _is_full_sweep(cells, total_positions):
+            continue
+        eaten_at = [idx for idx, (col, row) in enumerate(cells) if count(col, row) > 0]
+        cost = (eaten_at[-1] if eaten_at else 0, sum(eaten_at))
+        if best is None or cost < best[0]:
+            best = (cost, cells)
+    
+    path = [(col, row, count(col, row)) for col, row in best[1]]
+    print_path_report(grid, path)
     return path
+
+def path_report(grid, path):
+    """Summarize a path: length, coverage and how many steps cross empty cells"""
+    total_positions = sum(grid.column_length(col) for col in range(grid.cols))
+    visited = len({(col, row) for col, row, _ in path})
+    eaten_at = [idx for idx, (_, _, count) in enumerate(path) if count > 0]
+    last_contribution = eaten_at[-1] if eaten_at else -1
+    
+    return {
+        'moves': len(path),
+        'visited': visited,
+        'total_positions': total_positions,
+        'coverage': visited / total_positions * 100 if total_positions > 0 else 0,
+        'contributions': len(eaten_at),
+        'empty_steps_before_last_contribution': last_contribution + 1 - len(eaten_at)
+    }
+
+def print_path_report(grid, path):
+    """Print the path summary"""
+    report = path_report(grid, path)
+    print(f"Snake path: {report['moves']} moves, visited {report['visited']}/{report['total_positions']} positions "
+          f"({report['coverage']:.1f}% coverage)")
+    print(f"Found {report['contributions']} contributions, "
+          f"{report['empty_steps_before_last_contribution']} empty steps before the last one")
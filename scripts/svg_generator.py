@@ -1,83 +1,178 @@
 #!/usr/bin/env python3
 """
 SVG animation generator for GitHub Contribution Snake
+Writes the SVG text directly: cell geometry is defined once in <defs> and every
+cell is a <use> reference colored by a per-level CSS class
 """
 
-import svgwrite
+import gzip
+import io
+from pathlib import Path
 from .config import SNAKE_CONFIG, COLORS
+from .scene import Scene
 
-def generate_svg_animation(grid, snake_path, output_path, dark_mode=False):
-    """Generate SVG with snake path (simplified version)"""
-    if not grid:
-        print("No grid data available")
-        return
-        
-    rows = len(grid[0])
-    cols = len(grid)
-    
-    # Get configuration
-    cell_size = SNAKE_CONFIG['cell_size']
-    cell_spacing = SNAKE_CONFIG['cell_spacing']
-    snake_length = SNAKE_CONFIG['snake_length']
+def _percent(frame, total_frames):
+    """Format a frame index as a compact keyframe percentage"""
+    return f"{frame / total_frames * 100:.3f}".rstrip('0').rstrip('.') + '%'
+
+def _number(value):
+    """Format a number without a trailing '.0' or excess precision"""
+    return f"{value:.3f}".rstrip('0').rstrip('.')
+
+def build_animation_css(scene, colors, padding):
+    """Build the CSS keyframes that move the snake along its path and empty eaten cells
+
+    Returns the stylesheet and a mapping of (col, row) to the keyframe name for
+    each cell the snake eats.
+    """
+    snake_path = scene.snake_path
+    total_frames = scene.total_frames
+    cycle = total_frames * scene.frame_duration
+
+    rules = [
+        f".e{{animation:{cycle}ms step-end infinite}}",
+        f".s{{animation:snake {cycle}ms linear infinite}}"
+    ]
+
+    # Snake keyframes: glide between turns, then vanish once the head leaves the path
+    # (straight runs need no intermediate entries)
+    keyframes = []
+    for idx in scene.turns:
+        col, row, _ = snake_path[idx]
+        x, y = scene.cell_origin(col, row, padding)
+        keyframes.append(f"{_percent(idx, total_frames)}{{transform:translate({x}px,{y}px);opacity:1}}")
+    # The snake stays where it ended while it fades out
+    keyframes.append(f"{_percent(len(snake_path), total_frames)},100%{{transform:translate({x}px,{y}px);opacity:0}}")
+    rules.append("@keyframes snake{" + "".join(keyframes) + "}")
+
+    # Each eaten contribution switches to the empty color when the head reaches it
+    eaten = {}
+    for (col, row), idx in scene.eat_frames.items():
+        level = scene.levels[(col, row)]
+        name = f"e{len(eaten)}"
+        eaten[(col, row)] = name
+        rules.append(
+            f"@keyframes {name}{{0%{{fill:{colors['levels'][level]}}}"
+            f"{_percent(idx, total_frames)},100%{{fill:{colors['levels'][0]}}}}}"
+        )
+
+    return "\n".join(rules), eaten
+
+def iter_svg_chunks(scene, dark_mode=False, animated=True):
+    """Yield the SVG document as text chunks
+
+    With animated=True the snake and the eaten cells are driven by CSS keyframes
+    derived from the scene; otherwise a static snapshot of the snake is drawn.
+    """
+    snake_path = scene.snake_path
+    cell_size = scene.cell_size
+    snake_length = scene.snake_length
+    frame_duration = scene.frame_duration
     padding = 10
-    
+
     # Calculate SVG dimensions with padding
-    width = cols * (cell_size + cell_spacing) - cell_spacing + (padding * 2)
-    height = rows * (cell_size + cell_spacing) - cell_spacing + (padding * 2)
-    
+    width, height = scene.canvas_size(padding)
+
     # Get colors for mode
     colors = COLORS['dark'] if dark_mode else COLORS['light']
-    
-    # Create SVG
-    dwg = svgwrite.Drawing(output_path, size=(width, height))
-    dwg.add(dwg.rect(insert=(0, 0), size=(width, height), fill=colors['background']))
-    
-    # Draw contribution grid
-    for col in range(cols):
-        for row in range(rows):
-            x = col * (cell_size + cell_spacing) + padding
-            y = row * (cell_size + cell_spacing) + padding
-            
-            if col < len(grid) and row < len(grid[col]):
-                level = min(4, grid[col][row]['level'])
-                color = colors['levels'][level]
+
+    animated = animated and len(snake_path) > 0
+    eaten = {}
+
+    yield (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+           f'viewBox="0 0 {width} {height}">\n')
+    yield f'<defs><rect id="c" width="{cell_size}" height="{cell_size}" rx="2"/></defs>\n'
+
+    # Fills live in one class per contribution level instead of on every cell
+    css = "".join(f".l{level}{{fill:{color}}}" for level, color in enumerate(colors['levels']))
+    if animated:
+        animation_css, eaten = build_animation_css(scene, colors, padding)
+        css += "\n" + animation_css
+    yield f"<style>{css}</style>\n"
+    yield f'<rect width="{width}" height="{height}" fill="{colors["background"]}"/>\n'
+
+    # Draw contribution grid, one column per chunk
+    for col in range(scene.cols):
+        cells = []
+        for row in range(scene.rows):
+            x, y = scene.cell_origin(col, row, padding)
+            level = scene.levels.get((col, row), 0)
+
+            if (col, row) in eaten:
+                cells.append(f'<use href="#c" x="{x}" y="{y}" class="l{level} e" '
+                             f'style="animation-name:{eaten[(col, row)]}"/>')
             else:
-                color = colors['levels'][0]
-            
-            rect = dwg.rect(
-                insert=(x, y),
-                size=(cell_size, cell_size),
-                fill=color,
-                rx=2
-            )
-            dwg.add(rect)
-    
-    # Draw snake at a specific position (25% through the path)
-    snake_position = len(snake_path) // 4
-    
-    for i in range(snake_length):
-        pos_idx = snake_position + i
-        if pos_idx < len(snake_path):
-            col, row, _ = snake_path[pos_idx]
-            x = col * (cell_size + cell_spacing) + padding
-            y = row * (cell_size + cell_spacing) + padding
-            
-            # Snake head (brightest) or body
+                cells.append(f'<use href="#c" x="{x}" y="{y}" class="l{level}"/>')
+        yield "".join(cells) + "\n"
+
+    segments = []
+    if animated:
+        # Every segment follows the head's keyframes, delayed by its distance from the head
+        for i in reversed(range(snake_length)):
             if i == 0:
-                color = colors['snake_head']
-                opacity = 1.0
+                segments.append(f'<use href="#c" class="s" fill="{colors["snake_head"]}" opacity="0"/>')
             else:
-                color = colors['snake']
-                opacity = max(0.3, 1.0 - (i / snake_length) * 0.7)
-            
-            snake_rect = dwg.rect(
-                insert=(x, y),
-                size=(cell_size, cell_size),
-                fill=color,
-                fill_opacity=opacity,
-                rx=2
-            )
-            dwg.add(snake_rect)
-    
-    dwg.save()
-    print(f"SVG saved to: {output_path}")
+                opacity = _number(max(0.3, 1.0 - (i / snake_length) * 0.7))
+                segments.append(f'<use href="#c" class="s" fill="{colors["snake"]}" fill-opacity="{opacity}" '
+                                f'opacity="0" style="animation-delay:{i * frame_duration}ms"/>')
+    else:
+        # Draw snake at a specific position (25% through the path)
+        snake_position = len(snake_path) // 4
+
+        for i in range(snake_length):
+            pos_idx = snake_position + i
+            if pos_idx < len(snake_path):
+                col, row, _ = snake_path[pos_idx]
+                x, y = scene.cell_origin(col, row, padding)
+
+                # Snake head (brightest) or body
+                if i == 0:
+                    color = colors['snake_head']
+                    opacity = 1.0
+                else:
+                    color = colors['snake']
+                    opacity = max(0.3, 1.0 - (i / snake_length) * 0.7)
+
+                segments.append(f'<use href="#c" x="{x}" y="{y}" fill="{color}" '
+                                f'fill-opacity="{_number(opacity)}"/>')
+
+    yield "".join(segments) + "\n</svg>\n"
+
+def generate_svg_animation(grid, snake_path, output_path, dark_mode=False, animated=True, compress=None,
+                           scene=None):
+    """Generate SVG with the snake eating contributions
+
+    When compress is true (default: SNAKE_CONFIG['svgz']) a gzip'd copy is also
+    written next to the SVG with an .svgz suffix. Pass a prebuilt Scene to reuse
+    its simulation across themes and formats.
+    """
+    if not grid:
+        print("No grid data available")
+        return
+
+    if scene is None:
+        scene = Scene(grid, snake_path)
+
+    if compress is None:
+        compress = SNAKE_CONFIG.get('svgz', False)
+
+    svgz_path = Path(output_path).with_suffix('.svgz')
+    svgz_file = None
+    if compress:
+        # A fixed mtime keeps the compressed bytes identical for identical input
+        svgz_file = io.TextIOWrapper(gzip.GzipFile(svgz_path, 'wb', mtime=0), encoding='utf-8')
+
+    try:
+        with open(output_path, 'w', encoding='utf-8') as svg_file:
+            for chunk in iter_svg_chunks(scene, dark_mode, animated):
+                svg_file.write(chunk)
+                if svgz_file:
+                    svgz_file.write(chunk)
+    finally:
+        if svgz_file:
+            svgz_file.close()
+
+    kind = "Animated SVG" if animated else "SVG"
+    print(f"{kind} saved to: {output_path}")
+    if compress:
+        print(f"Compressed SVG saved to: {svgz_path}")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Animated WebP generator for GitHub Contribution Snake
+Streams the same delta frames as the GIF into an animated WebP: each frame's
+changed region is encoded by Pillow's WebP encoder, lossless or lossy, and
+written as an ANMF chunk alpha-blended over the previous frame
+"""
+
+import io
+import struct
+from functools import partial
+from PIL import Image, features
+from .config import SNAKE_CONFIG
+from .scene import Scene
+from .gif_generator import FrameWriter, get_sprite_atlas, iter_encoded_frames, write_frames
+
+# VP8X flags: the animation has alpha and is animated
+VP8X_ALPHA = 0x10
+VP8X_ANIMATION = 0x02
+
+# ANMF flag for the first frame, which replaces the canvas; later frames are alpha-blended over it
+ANMF_NO_BLEND = 0x02
+
+# Chunks of a single-image WebP that carry the image itself
+FRAME_CHUNKS = (b'ALPH', b'VP8 ', b'VP8L')
+
+def riff_chunk(fourcc, data):
+    """Serialize a RIFF chunk, padded to an even length"""
+    return fourcc + struct.pack('<I', len(data)) + data + b'\x00' * (len(data) & 1)
+
+def iter_riff_chunks(data):
+    """Yield (fourcc, data) for every chunk of an encoded WebP"""
+    pos = 12
+    while pos < len(data):
+        fourcc, length = struct.unpack('<4sI', data[pos:pos + 8])
+        yield fourcc, data[pos + 8:pos + 8 + length]
+        pos += 8 + length + (length & 1)
+
+def uint24(value):
+    """Pack an unsigned 24-bit little-endian integer"""
+    return struct.pack('<I', value)[:3]
+
+def encode_webp_frame(image, offset=(0, 0), transparent_index=None, lossless=True, quality=80, method=4):
+    """Encode a palette frame and return (offset, size, image chunks) for WebpWriter
+
+    Pixels at the transparent index become fully transparent. Frame offsets
+    must be even in WebP, so odd ones are widened by a transparent pixel.
+    """
+    left, top = offset
+    image = image.copy()
+    if transparent_index is not None:
+        image.info['transparency'] = transparent_index
+    image = image.convert('RGBA')
+
+    if left % 2 or top % 2:
+        padded = Image.new('RGBA', (image.width + left % 2, image.height + top % 2), (0, 0, 0, 0))
+        padded.paste(image, (left % 2, top % 2))
+        image, left, top = padded, left - left % 2, top - top % 2
+
+    buffer = io.BytesIO()
+    image.save(buffer, 'WEBP', lossless=lossless, quality=quality, alpha_quality=100, method=method, exact=True)
+    data = b''.join(riff_chunk(fourcc, chunk) for fourcc, chunk in iter_riff_chunks(buffer.getvalue())
+                    if fourcc in FRAME_CHUNKS)
+    return (left, top), image.size, data
+
+def webp_frame_encoder(theme='dark'):
+    """Return the picklable frame encoder for the configured WebP settings"""
+    return partial(encode_webp_frame, transparent_index=get_sprite_atlas(theme).transparent_index,
+                   lossless=SNAKE_CONFIG['webp_lossless'], quality=SNAKE_CONFIG['webp_quality'],
+                   method=SNAKE_CONFIG['webp_method'])
+
+class WebpWriter(FrameWriter):
+    """Streaming animated WebP encoder, the WebP counterpart of GifWriter
+
+    The RIFF header holds the file size, so it is patched in when the file is closed.
+    """
+
+    def __init__(self, output_path, size, loop=0, background=(0, 0, 0, 0)):
+        """Open the output file and write the header and animation parameters"""
+        super().__init__(output_path)
+
+        self.fp.write(b'RIFF' + struct.pack('<I', 0) + b'WEBP')
+        canvas = struct.pack('<B3x', VP8X_ALPHA | VP8X_ANIMATION) + uint24(size[0] - 1) + uint24(size[1] - 1)
+        self.fp.write(riff_chunk(b'VP8X', canvas))
+        # Background color is stored as BGRA
+        red, green, blue, alpha = background
+        self.fp.write(riff_chunk(b'ANIM', bytes([blue, green, red, alpha]) + struct.pack('<H', loop)))
+
+    def _write_frame(self, frame, duration):
+        (left, top), size, data = frame
+        flags = ANMF_NO_BLEND if self.frame_count == 0 else 0
+        header = (uint24(left // 2) + uint24(top // 2) + uint24(size[0] - 1) + uint24(size[1] - 1) +
+                  uint24(min(duration, 0xffffff)) + bytes([flags]))
+        self.fp.write(riff_chunk(b'ANMF', header + data))
+
+    def _finish(self):
+        """Record the file size in the RIFF header"""
+        file_size = self.fp.tell()
+        self.fp.seek(4)
+        self.fp.write(struct.pack('<I', file_size - 8))
+
+def generate_webp_animation(grid, snake_path, output_path, dark_mode=True, scene=None, frames=None):
+    """Generate an animated WebP of the snake eating contributions
+
+    Takes the same scene and pre-rendered frames (from submit_frames with
+    webp_frame_encoder) as generate_gif_animation.
+    """
+    if not grid:
+        print("No grid data available")
+        return
+
+    if not features.check('webp'):
+        print("Pillow was built without WebP support, skipping WebP animation")
+        return
+
+    if scene is None:
+        scene = Scene(grid, snake_path)
+    theme_name = "dark" if dark_mode else "light"
+
+    if frames is None:
+        frames = iter_encoded_frames(scene, dark_mode, encode=webp_frame_encoder(theme_name))
+
+    print(f"Creating {len(scene.timeline)} frames for WebP animation...")
+
+    size = scene.canvas_size(SNAKE_CONFIG['padding'])
+    with WebpWriter(output_path, size) as writer:
+        write_frames(writer, frames, scene.timeline)
+
+    print(f"WebP animation ({theme_name} theme) saved to: {output_path}")